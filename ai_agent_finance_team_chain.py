@@ -1,47 +1,123 @@
 import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from fastapi import FastAPI, HTTPException # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
 from pydantic import BaseModel # type: ignore
-from langchain.agents import initialize_agent, AgentType, Tool
-from langchain_community.tools import DuckDuckGoSearchRun, YahooFinanceNewsTool # type: ignore
-from langchain_aws import ChatBedrock # type: ignore
+from query_cache import QueryCache
+from metrics import REGISTRY, metrics_router, timed
 import logging
-import uvicorn # type: ignore
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)    
 
 app = FastAPI()
+app.include_router(metrics_router())
+
+FAST_PATH = os.environ.get("AGENT_FAST_PATH", "1") == "1"
+TOOL_TIMEOUTS = {
+    "yahoo_finance": float(os.environ.get("YAHOO_FINANCE_TIMEOUT", "8")),
+    "web_search": float(os.environ.get("WEB_SEARCH_TIMEOUT", "8"))
+}
+MAX_TOOL_CHARS = 4000
+MAX_BATCH_SYMBOLS = int(os.environ.get("MAX_BATCH_SYMBOLS", "500"))
+MARKET_NEWS_QUERY = "stock market news today"
+TRADING_SERVICE_URL = os.environ.get("TRADING_SERVICE_URL", "http://localhost:8000")
+INDICATORS_TIMEOUT = float(os.environ.get("INDICATORS_TIMEOUT", "1"))
 
 class QueryRequest(BaseModel):
     query: str
+    refresh: bool = False
+    indicators: Optional[Dict[str, Any]] = None
+
+class BatchQueryRequest(BaseModel):
+    symbols: List[str]
+    query: str = "outlook"
+    max_concurrency: int = 8
+    per_symbol_search: bool = False
+    refresh: bool = False
+    indicators: Optional[Dict[str, Dict[str, Any]]] = None
 
 class AIAgentFinanceTeamChain:
-    def __init__(self):
-        self.llm = ChatBedrock(
-            model_id="anthropic.claude-3-5-sonnet-20241022-v2.0",
-            model_kwargs={
-                "max_tokens": 2000,
-                "temperature": 0,
-                "anthropic_version": "bedrock-2023-05-31"
-            },
-            #client_kwargs={"region_name": "us-east-1"}  # Ensure the region is correct
-        )
-        self.web_search_tool = Tool(
-            name="DuckDuckGo Search",
-            func=DuckDuckGoSearchRun().run,
-            description="Use this tool to search the web for information."
-        )
-        self.yahoo_finance_tool = Tool(
-            name="Yahoo Finance News",
-            func=self.slfe_yahoo_finance_run, #YahooFinanceNewsTool().run,
-            description="Use this tool to get the latest news from Yahoo Finance."
-        )
-        self.multi_agent = initialize_agent(
-            [self.web_search_tool],#, self.yahoo_finance_tool],
-            self.llm,
-            agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-            verbose=True
-        )
+    """
+    The LLM, tools and agent are built on first use, so importing this module
+    and constructing the chain do not pull in LangChain or open AWS clients.
+    """
+    def __init__(self, fast_path: bool = FAST_PATH):
+        self.fast_path = fast_path
+        self.tool_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent-tool")
+        self._lock = threading.RLock()
+        self._llm = None
+        self._web_search_tool = None
+        self._yahoo_finance_tool = None
+        self._yahoo_news = None
+        self._multi_agent = None
+
+    @property
+    def llm(self):
+        with self._lock:
+            if self._llm is None:
+                from langchain_aws import ChatBedrock # type: ignore
+                self._llm = ChatBedrock(
+                    model_id="anthropic.claude-3-5-sonnet-20241022-v2.0",
+                    model_kwargs={
+                        "max_tokens": 2000,
+                        "temperature": 0,
+                        "anthropic_version": "bedrock-2023-05-31"
+                    },
+                    #client_kwargs={"region_name": "us-east-1"}  # Ensure the region is correct
+                )
+            return self._llm
+
+    @property
+    def web_search_tool(self):
+        with self._lock:
+            if self._web_search_tool is None:
+                from langchain.agents import Tool
+                from langchain_community.tools import DuckDuckGoSearchRun # type: ignore
+                self._web_search_tool = Tool(
+                    name="DuckDuckGo Search",
+                    func=DuckDuckGoSearchRun().run,
+                    description="Use this tool to search the web for information."
+                )
+            return self._web_search_tool
+
+    @property
+    def yahoo_finance_tool(self):
+        with self._lock:
+            if self._yahoo_finance_tool is None:
+                from langchain.agents import Tool
+                self._yahoo_finance_tool = Tool(
+                    name="Yahoo Finance News",
+                    func=self.slfe_yahoo_finance_run, #YahooFinanceNewsTool().run,
+                    description="Use this tool to get the latest news from Yahoo Finance."
+                )
+            return self._yahoo_finance_tool
+
+    @property
+    def multi_agent(self):
+        with self._lock:
+            if self._multi_agent is None:
+                from langchain.agents import initialize_agent, AgentType
+                self._multi_agent = initialize_agent(
+                    [self.web_search_tool],#, self.yahoo_finance_tool],
+                    self.llm,
+                    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+                    verbose=True
+                )
+            return self._multi_agent
+
+    def yahoo_news(self):
+        with self._lock:
+            if self._yahoo_news is None:
+                from langchain_community.tools import YahooFinanceNewsTool # type: ignore
+                self._yahoo_news = YahooFinanceNewsTool()
+            return self._yahoo_news
+
     def slfe_yahoo_finance_run(self, query: str) -> dict:
         """
         Safely run the Yahoo Finance tool with error handling.
@@ -50,10 +126,41 @@ class AIAgentFinanceTeamChain:
             ticker = query.strip().split()[0].upper()
             if not ticker:
                 raise ValueError("No ticker symbol provided.")
-            return YahooFinanceNewsTool().run(ticker)
+            return self.yahoo_news().run(ticker)
         except Exception as e:
             logger.error(f"Error in Yahoo Finance tool: {e}")
             return {"error": str(e)}
+    def fetch_indicators(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Indicator snapshots from the trading service's /trading/indicators, or
+        an empty dict on any error. One attempt, no retries: callers wait for
+        it only until their INDICATORS_TIMEOUT deadline.
+        """
+        import requests
+        try:
+            with timed("agent_tool_seconds", "Tool call latency.", tool="indicators"):
+                response = requests.get(f"{TRADING_SERVICE_URL}/trading/indicators", params={"symbols": ",".join(symbols)}, timeout=INDICATORS_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error fetching indicators: {e}")
+            return {}
+
+    def submit_indicators(self, symbols: List[str]) -> Tuple[Future, float]:
+        """
+        Start fetch_indicators on the tool pool; returns the future and its
+        time.monotonic() deadline for await_indicators.
+        """
+        return self.tool_executor.submit(self.fetch_indicators, symbols), time.monotonic() + INDICATORS_TIMEOUT
+
+    def await_indicators(self, pending: Tuple[Future, float]) -> Dict[str, Dict[str, Any]]:
+        future, deadline = pending
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            REGISTRY.counter("agent_tool_timeouts_total", "Tool calls abandoned after their timeout.", tool="indicators").inc()
+            return {}
+
     def generate_prompt(self, query: str) -> str:
         """
         Generate a prompt for the agent based on the user query.
@@ -81,7 +188,172 @@ class AIAgentFinanceTeamChain:
         Here is the user's query: {query}
         """
     
-    def run_query(self, query: str) -> str:
+    def iter_tool_results(self, query: str, timeouts: Dict[str, float] = TOOL_TIMEOUTS, web_search: bool = True, executor: Optional[ThreadPoolExecutor] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Run Yahoo Finance and web search concurrently and yield (tool, result)
+        as each one finishes. Each tool's timeout counts from when it starts
+        running, so time spent queued behind other requests on the shared
+        pool is not charged to it. Batches pass their own `executor`.
+        """
+        ticker = query.strip().split()[0].upper()
+        executor = executor or self.tool_executor
+        started: Dict[str, float] = {}
+
+        def run(name: str, fn: Callable[[str], Any], arg: str) -> Any:
+            started[name] = time.monotonic()
+            with timed("agent_tool_seconds", "Tool call latency.", tool=name):
+                return fn(arg)
+
+        pending = {executor.submit(run, "yahoo_finance", self.slfe_yahoo_finance_run, ticker): "yahoo_finance"}
+        if web_search:
+            pending[executor.submit(run, "web_search", self.web_search_tool.func, f"{ticker} stock news {query}")] = "web_search"
+        while pending:
+            # A tool still queued cannot time out before now + its timeout.
+            now = time.monotonic()
+            deadline = min(started.get(name, now) + timeouts[name] for name in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, deadline - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                    yield name, result if isinstance(result, dict) else str(result)[:MAX_TOOL_CHARS]
+                except Exception as e:
+                    logger.error(f"Error in tool {name}: {e}")
+                    yield name, {"error": str(e)}
+            now = time.monotonic()
+            for future, name in list(pending.items()):
+                if name in started and now >= started[name] + timeouts[name]:
+                    del pending[future]
+                    REGISTRY.counter("agent_tool_timeouts_total", "Tool calls abandoned after their timeout.", tool=name).inc()
+                    logger.error(f"Tool {name} timed out after {timeouts[name]}s")
+                    yield name, {"error": f"timed out after {timeouts[name]}s"}
+
+    def gather_tool_results(self, query: str, timeouts: Dict[str, float] = TOOL_TIMEOUTS, web_search: bool = True, executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+        return dict(self.iter_tool_results(query, timeouts, web_search, executor))
+
+    def generate_synthesis_prompt(self, query: str, tool_results: Dict[str, Any], market_news: Optional[str] = None, indicators: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Prompt for the single synthesis call, with the tool results inlined.
+        """
+        ticker = query.strip().split()[0].upper()
+        context = f"General market news: {json.dumps(market_news)}" if market_news else ""
+        technicals = f"Technical indicators (precomputed on recent bars): {json.dumps(indicators, separators=(',', ':'))}" if indicators else ""
+        return f"""
+        You are a financial analyst. Using only the tool results below, answer the user's query.
+        Respond with JSON only, in this format:
+        {{
+            "symbol":"{ticker}",
+            "web_insights":"KEY_FINDINGS_FROM_WEB",
+            "financial_data":"KEY_METRICS_FROM_YAHOO_FINANCE",
+            "combined_analysis":"SYNTHESIZED_INSIGHTS",
+            "recomendation": "BUY, SELL, or HOLD based on the analysis"
+        }}
+        Yahoo Finance results: {json.dumps(tool_results.get("yahoo_finance"), separators=(",", ":"))}
+        Web search results: {json.dumps(tool_results.get("web_search"), separators=(",", ":"))}
+        {technicals}
+        {context}
+        Here is the user's query: {query}
+        """
+
+    def run_query_fast(self, query: str, indicators: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Gather tool results concurrently, then make one LLM call for the JSON
+        answer. Indicators are fetched alongside the tools unless provided.
+        """
+        ticker = query.strip().split()[0].upper()
+        pending = None if indicators is not None else self.submit_indicators([ticker])
+        with timed("agent_tools_seconds", "Wall time gathering all tool results.", path="query"):
+            tool_results = self.gather_tool_results(query)
+            if pending is not None:
+                indicators = self.await_indicators(pending).get(ticker)
+        with timed("agent_llm_seconds", "LLM call latency.", call="synthesis"):
+            response = self.llm.invoke(self.generate_synthesis_prompt(query, tool_results, indicators=indicators))
+        return response.content.strip()
+
+    def market_news(self) -> str:
+        """
+        One general market-news search, shared by every symbol in a batch.
+        """
+        try:
+            with timed("agent_tool_seconds", "Tool call latency.", tool="market_news"):
+                return str(self.web_search_tool.func(MARKET_NEWS_QUERY))[:MAX_TOOL_CHARS]
+        except Exception as e:
+            logger.error(f"Error fetching market news: {e}")
+            return ""
+
+    def analyze_symbol(self, symbol: str, query: str, market_news: str, per_symbol_search: bool = False, indicators: Optional[Dict[str, Any]] = None, executor: Optional[ThreadPoolExecutor] = None) -> str:
+        symbol_query = f"{symbol} {query}"
+        with timed("agent_tools_seconds", "Wall time gathering all tool results.", path="batch"):
+            tool_results = self.gather_tool_results(symbol_query, web_search=per_symbol_search, executor=executor)
+        with timed("agent_llm_seconds", "LLM call latency.", call="batch"):
+            response = self.llm.invoke(self.generate_synthesis_prompt(symbol_query, tool_results, market_news, indicators))
+        return response.content.strip()
+
+    def run_batch(self, symbols: List[str], query: str, max_concurrency: int = 8, per_symbol_search: bool = False, cache: Optional[QueryCache] = None, refresh: bool = False, indicators: Optional[Dict[str, Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze many symbols with at most `max_concurrency` in flight, yielding
+        one result per symbol as it finishes. Failures are reported per symbol.
+        Indicators for every symbol come from one trading-service call. Tools
+        run on a pool sized to the batch, not the pool shared with /query.
+        """
+        supplied = indicators or {}
+        pending = self.submit_indicators([s for s in symbols if s not in supplied])
+        market_news = self.market_news()
+        indicators = {**self.await_indicators(pending), **supplied}
+        max_concurrency = max(1, max_concurrency)
+        tools = ThreadPoolExecutor(max_workers=max_concurrency * (2 if per_symbol_search else 1), thread_name_prefix="agent-batch-tool")
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent-batch") as pool:
+                def analyze(symbol):
+                    if cache is None:
+                        return self.analyze_symbol(symbol, query, market_news, per_symbol_search, indicators.get(symbol), tools)
+                    return cache.get_or_compute(cache_key(f"{symbol} batch {query}", supplied.get(symbol)), lambda: self.analyze_symbol(symbol, query, market_news, per_symbol_search, indicators.get(symbol), tools), refresh=refresh)
+                futures = {pool.submit(analyze, symbol): symbol for symbol in symbols}
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        yield {"symbol": symbol, "response": future.result()}
+                    except Exception as e:
+                        logger.error(f"Error analyzing {symbol}: {e}")
+                        yield {"symbol": symbol, "error": str(e)}
+        finally:
+            # Abandoned tools may still be running; do not wait for them.
+            tools.shutdown(wait=False)
+
+    def stream_query_fast(self, query: str, indicators: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Fast path as a stream of events: one "tool" event per tool as it
+        finishes (indicators included), "token" events while the synthesis
+        call streams, then "done" with the full response.
+        """
+        ticker = query.strip().split()[0].upper()
+        pending = None if indicators is not None else self.submit_indicators([ticker])
+        tool_results = {}
+        for name, result in self.iter_tool_results(query):
+            tool_results[name] = result
+            yield {"event": "tool", "name": name, "result": result}
+        if pending is not None:
+            indicators = self.await_indicators(pending).get(ticker)
+            if indicators:
+                yield {"event": "tool", "name": "indicators", "result": indicators}
+        chunks = []
+        started = time.perf_counter()
+        for chunk in self.llm.stream(self.generate_synthesis_prompt(query, tool_results, indicators=indicators)):
+            if chunk.content:
+                if not chunks:
+                    REGISTRY.histogram("agent_llm_first_token_seconds", "Time to the first streamed LLM token.").observe(time.perf_counter() - started)
+                chunks.append(chunk.content)
+                yield {"event": "token", "text": chunk.content}
+        REGISTRY.histogram("agent_llm_seconds", "LLM call latency.", call="stream").observe(time.perf_counter() - started)
+        yield {"event": "done", "response": "".join(chunks).strip()}
+
+    def run_query(self, query: str, indicators: Optional[Dict[str, Any]] = None) -> str:
+        if self.fast_path:
+            try:
+                return self.run_query_fast(query, indicators)
+            except Exception as e:
+                logger.error(f"Error in fast path execution: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
         prompt = "ggggg"#self.generate_prompt(query)
         try:
             #response = self.multi_agent.run(prompt)
@@ -90,17 +362,87 @@ class AIAgentFinanceTeamChain:
             logger.error(f"Error in agent execution: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+def cache_key(query: str, indicators: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key for a query. Caller-supplied indicators change the prompt, so
+    they are part of the key; fetched ones are not, as before.
+    """
+    if not indicators:
+        return query
+    return f"{query} indicators {json.dumps(indicators, sort_keys=True, separators=(',', ':'))}"
+
 ai_agent_chain = AIAgentFinanceTeamChain()
+query_cache = QueryCache(
+    ttl=float(os.environ.get("QUERY_CACHE_TTL", "900")),
+    max_entries=int(os.environ.get("QUERY_CACHE_SIZE", "512")),
+    path=os.environ.get("QUERY_CACHE_PATH")
+)
+for field in ("hits", "misses"):
+    REGISTRY.gauge(f"agent_query_cache_{field}", lambda field=field: query_cache.stats()[field], f"Query cache {field}.")
 
 @app.post("/query")
 def query_agent(req: QueryRequest):
     try:
-        response = ai_agent_chain.run_query(req.query)
+        with timed("agent_request_seconds", "End-to-end request latency.", endpoint="query"):
+            response = query_cache.get_or_compute(cache_key(req.query, req.indicators), lambda: ai_agent_chain.run_query(req.query, req.indicators), refresh=req.refresh)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def sse_events(req: QueryRequest) -> Iterator[str]:
+    """
+    Server-Sent Events for /query/stream. Cached responses are sent as a
+    single token followed by "done"; fresh runs are cached once complete.
+    """
+    key = cache_key(req.query, req.indicators)
+    try:
+        cached = None if req.refresh else query_cache.get(key)
+        if cached is not None:
+            events = iter([{"event": "token", "text": cached}, {"event": "done", "response": cached, "cached": True}])
+        elif ai_agent_chain.fast_path:
+            events = ai_agent_chain.stream_query_fast(req.query, req.indicators)
+        else:
+            response = ai_agent_chain.run_query(req.query, req.indicators)
+            events = iter([{"event": "token", "text": response}, {"event": "done", "response": response}])
+        for event in events:
+            if event["event"] == "done" and not event.get("cached"):
+                query_cache.set(key, event["response"])
+            yield f"data: {json.dumps(event)}\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming query: {e}")
+        yield f"data: {json.dumps({'event': 'error', 'detail': str(e)})}\n\n"
+
+@app.post("/query/stream")
+def query_agent_stream(req: QueryRequest):
+    return StreamingResponse(sse_events(req), media_type="text/event-stream")
+
+@app.post("/query/batch")
+def query_agent_batch(req: BatchQueryRequest):
+    symbols = list(dict.fromkeys(s.strip().upper() for s in req.symbols if s.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols provided.")
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SYMBOLS} symbols per batch.")
+
+    def lines():
+        failed = 0
+        for result in ai_agent_chain.run_batch(symbols, req.query, min(req.max_concurrency, 32), req.per_symbol_search, query_cache, req.refresh, {s.upper(): v for s, v in (req.indicators or {}).items()}):
+            failed += "error" in result
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"event": "done", "succeeded": len(symbols) - failed, "failed": failed}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/query/cache")
+def query_cache_stats():
+    return query_cache.stats()
+
+@app.delete("/query/cache")
+def clear_query_cache():
+    query_cache.invalidate()
+    return {"message": "Query cache cleared."}
     
 if __name__ == "__main__":
+    import uvicorn # type: ignore
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
         
@@ -0,0 +1,191 @@
+import argparse
+import json
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, NamedTuple, Optional
+
+
+class Bars(NamedTuple):
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    day_end: np.ndarray
+
+
+@dataclass
+class BacktestResult:
+    total_pnl: float
+    n_trades: int
+    win_rate: float
+    max_drawdown: float
+    equity: np.ndarray = field(repr=False)
+    trades: Dict[str, np.ndarray] = field(repr=False)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "total_pnl": self.total_pnl,
+            "n_trades": self.n_trades,
+            "win_rate": self.win_rate,
+            "max_drawdown": self.max_drawdown
+        }
+
+
+TIMESTAMP_COLUMNS = ("timestamp", "datetime", "time", "date")
+
+
+def bars_from_arrays(timestamp: np.ndarray, close: np.ndarray, open_: Optional[np.ndarray] = None, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None) -> Bars:
+    """
+    Build Bars from raw arrays. Timestamps are datetime64 values; high/low
+    default to the close when only close prices are available.
+    """
+    timestamp = np.asarray(timestamp, dtype="datetime64[ns]")
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    open_ = close if open_ is None else np.ascontiguousarray(open_, dtype=np.float64)
+    high = close if high is None else np.ascontiguousarray(high, dtype=np.float64)
+    low = close if low is None else np.ascontiguousarray(low, dtype=np.float64)
+    day = timestamp.astype("datetime64[D]")
+    boundaries = np.flatnonzero(day[1:] != day[:-1])
+    ends = np.append(boundaries, len(close) - 1)
+    counts = np.diff(np.concatenate([[-1], ends]))
+    day_end = np.repeat(ends, counts)
+    return Bars(timestamp, open_, high, low, close, day_end)
+
+
+def load_bars(path: str, symbol: Optional[str] = None) -> Bars:
+    """
+    Load minute bars from a CSV or Parquet file. The file needs a timestamp
+    column and a close column; open/high/low and symbol are optional.
+    """
+    import pandas as pd # type: ignore
+    if path.endswith((".parquet", ".pq")):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    frame.columns = [c.lower() for c in frame.columns]
+    if symbol is not None and "symbol" in frame.columns:
+        frame = frame[frame["symbol"].str.upper() == symbol.upper()]
+    time_column = next((c for c in TIMESTAMP_COLUMNS if c in frame.columns), None)
+    if time_column is None or "close" not in frame.columns:
+        raise ValueError(f"{path} needs a timestamp and a close column.")
+    frame = frame.sort_values(time_column)
+    timestamp = pd.to_datetime(frame[time_column]).to_numpy(dtype="datetime64[ns]")
+    return bars_from_arrays(
+        timestamp,
+        frame["close"].to_numpy(),
+        frame["open"].to_numpy() if "open" in frame.columns else None,
+        frame["high"].to_numpy() if "high" in frame.columns else None,
+        frame["low"].to_numpy() if "low" in frame.columns else None
+    )
+
+
+def rising_signals(close: np.ndarray, rising_window: int = 3) -> np.ndarray:
+    """
+    Boolean mask of bars where the last `rising_window` closes are strictly
+    rising, the same rule RisingCloseDetector applies tick by tick.
+    """
+    if rising_window < 2:
+        raise ValueError("Rising window must be at least 2.")
+    signal = np.zeros(len(close), dtype=bool)
+    steps = rising_window - 1
+    if len(close) <= steps:
+        return signal
+    up = np.concatenate([[0], np.cumsum(close[1:] > close[:-1])])
+    signal[steps:] = up[steps:] - up[:-steps] == steps
+    return signal
+
+
+def run_backtest(bars: Bars, quantity: int = 10, stop_loss_pct: float = 0.995, take_profit_pct: float = 1.015, rising_window: int = 3, chunk_elements: int = 1 << 22) -> BacktestResult:
+    """
+    Replay SwingHigh over bars. Every rising run opens one bracket at the
+    close of the bar where it reaches `rising_window`, with take profit at
+    close * take_profit_pct and stop loss at close * stop_loss_pct. A bracket
+    exits on the first later bar of the same session whose high/low crosses
+    a level (stop first when both cross), and anything still open is sold at
+    the session's last close, as before_market_closes does. Fills are
+    assumed at the trigger level.
+    """
+    close, high, low, day_end = bars.close, bars.high, bars.low, bars.day_end
+    signal = rising_signals(close, rising_window)
+    first = signal & ~np.concatenate([[False], signal[:-1]])
+    entries = np.flatnonzero(first & (np.arange(len(close)) < day_end))
+    entry_price = close[entries]
+    tp_level = entry_price * take_profit_pct
+    sl_level = entry_price * stop_loss_pct
+    exit_index = day_end[entries].copy()
+    exit_price = close[exit_index]
+    exit_reason = np.zeros(len(entries), dtype=np.int8)
+
+    if len(entries):
+        horizon = int((day_end[entries] - entries).max())
+        offsets = np.arange(1, horizon + 1)
+        chunk = max(1, chunk_elements // horizon)
+        for start in range(0, len(entries), chunk):
+            rows = slice(start, start + chunk)
+            idx = entries[rows, None] + offsets
+            valid = idx <= day_end[entries[rows], None]
+            idx = np.minimum(idx, len(close) - 1)
+            sl_hit = valid & (low[idx] <= sl_level[rows, None])
+            tp_hit = valid & (high[idx] >= tp_level[rows, None])
+            sl_first = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), horizon)
+            tp_first = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), horizon)
+            stopped = (sl_first < horizon) & (sl_first <= tp_first)
+            took = (tp_first < horizon) & ~stopped
+            rows_exit = exit_index[rows]
+            rows_price = exit_price[rows]
+            rows_reason = exit_reason[rows]
+            rows_exit[stopped] = entries[rows][stopped] + 1 + sl_first[stopped]
+            rows_price[stopped] = sl_level[rows][stopped]
+            rows_reason[stopped] = 1
+            rows_exit[took] = entries[rows][took] + 1 + tp_first[took]
+            rows_price[took] = tp_level[rows][took]
+            rows_reason[took] = 2
+
+    pnl = (exit_price - entry_price) * quantity
+    equity = np.cumsum(np.bincount(exit_index, weights=pnl, minlength=len(close)))
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0.0)) - equity
+    return BacktestResult(
+        total_pnl=float(pnl.sum()),
+        n_trades=int(len(entries)),
+        win_rate=float((pnl > 0).mean()) if len(entries) else 0.0,
+        max_drawdown=float(drawdown.max()) if len(drawdown) else 0.0,
+        equity=equity,
+        trades={
+            "entry_time": bars.timestamp[entries],
+            "entry_price": entry_price,
+            "exit_time": bars.timestamp[exit_index],
+            "exit_price": exit_price,
+            "exit_reason": exit_reason,
+            "pnl": pnl
+        }
+    )
+
+
+EXIT_REASONS = ("session_close", "stop_loss", "take_profit")
+
+
+def trades_frame(result: BacktestResult):
+    import pandas as pd # type: ignore
+    frame = pd.DataFrame(result.trades)
+    frame["exit_reason"] = np.array(EXIT_REASONS)[frame["exit_reason"]]
+    return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the SwingHigh strategy on local minute bars.")
+    parser.add_argument("path")
+    parser.add_argument("--symbol")
+    parser.add_argument("--quantity", type=int, default=10)
+    parser.add_argument("--stop-loss-pct", type=float, default=0.995)
+    parser.add_argument("--take-profit-pct", type=float, default=1.015)
+    parser.add_argument("--rising-window", type=int, default=3)
+    parser.add_argument("--trades", help="Write the trade list to this CSV file.")
+    args = parser.parse_args()
+    if args.rising_window < 2:
+        parser.error("--rising-window must be at least 2")
+
+    result = run_backtest(load_bars(args.path, args.symbol), args.quantity, args.stop_loss_pct, args.take_profit_pct, args.rising_window)
+    print(json.dumps(result.summary(), indent=2))
+    if args.trades:
+        trades_frame(result).to_csv(args.trades, index=False)
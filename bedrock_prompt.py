@@ -0,0 +1,126 @@
+import json
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+ANALYSIS_INSTRUCTION = "Analyze the market data and trading status to provide a summary of the market and trading status. Use the following data:"
+
+# Monitoring fields published in /trading/status that add tokens but no signal.
+REDUNDANT_FIELDS = frozenset(["status", "updated_at", "quote_cache", "order_pipeline"])
+
+
+def compact_json(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Claude token estimate (about 3.5 characters per token).
+    """
+    return math.ceil(len(text) / 3.5)
+
+
+def prune(obj: Any, drop: Iterable[str] = REDUNDANT_FIELDS) -> Any:
+    """
+    Drop redundant keys and empty values recursively.
+    """
+    drop = frozenset(drop)
+    if isinstance(obj, dict):
+        pruned = {k: prune(v, drop) for k, v in obj.items() if k not in drop}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(obj, list):
+        return [prune(v, drop) for v in obj if v not in (None, "", [], {})]
+    return obj
+
+
+def shrink(obj: Any, max_chars: int, max_items: int) -> Any:
+    """
+    Summarize long strings to their head and tail and cut long lists and
+    dicts, noting how much was removed.
+    """
+    if isinstance(obj, str) and len(obj) > max_chars:
+        head = max_chars * 2 // 3
+        tail = max_chars - head
+        return f"{obj[:head]} ...[{len(obj) - max_chars} chars omitted]... {obj[-tail:]}"
+    if isinstance(obj, dict):
+        items = {k: shrink(v, max_chars, max_items) for k, v in list(obj.items())[:max_items]}
+        if len(obj) > max_items:
+            items["..."] = f"[{len(obj) - max_items} more keys]"
+        return items
+    if isinstance(obj, list):
+        items = [shrink(v, max_chars, max_items) for v in obj[:max_items]]
+        if len(obj) > max_items:
+            items.append(f"...[{len(obj) - max_items} more items]")
+        return items
+    return obj
+
+
+class BedrockPromptBuilder:
+    """
+    Builds the analysis prompt from compact JSON within an input token budget
+    and sizes max_tokens to the input.
+    """
+    def __init__(self, input_budget: int = 3000, min_output_tokens: int = 256, max_output_tokens: int = 1000):
+        self.input_budget = input_budget
+        self.min_output_tokens = min_output_tokens
+        self.max_output_tokens = max_output_tokens
+
+    def payload(self, market_data: Dict[str, Any], trading_status: Dict[str, Any]) -> Tuple[str, bool]:
+        data = {"market_data": prune(market_data or {}), "trading_status": prune(trading_status or {})}
+        text = compact_json(data)
+        budget = self.input_budget - estimate_tokens(ANALYSIS_INSTRUCTION) - 1
+        truncated = False
+        max_chars, max_items = 2000, 50
+        while estimate_tokens(text) > budget and max_chars > 40:
+            truncated = True
+            text = compact_json({name: shrink(section, max_chars, max_items) for name, section in data.items()})
+            max_chars //= 2
+            max_items = max(1, max_items // 2)
+        if estimate_tokens(text) > budget:
+            # Deeply nested data can stay over budget after shrinking; cut the text.
+            truncated = True
+            note = "...[truncated]"
+            text = text[:max(0, int(budget * 3.5) - len(note))] + note
+        return text, truncated
+
+    def build(self, market_data: Dict[str, Any], trading_status: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Return the Bedrock messages-API request body and prompt stats.
+        """
+        text, truncated = self.payload(market_data, trading_status)
+        prompt = f"{ANALYSIS_INSTRUCTION}\n{text}"
+        input_tokens = estimate_tokens(prompt)
+        max_tokens = min(self.max_output_tokens, max(self.min_output_tokens, input_tokens // 2))
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        return body, {"estimated_input_tokens": input_tokens, "max_tokens": max_tokens, "truncated": truncated}
+
+
+class UsageTracker:
+    """
+    Per-symbol token counts and latency for Bedrock calls.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, float]] = {}
+
+    def record(self, symbol: Optional[str], input_tokens: int, output_tokens: int, latency: float) -> Dict[str, float]:
+        with self._lock:
+            usage = self._usage.setdefault(symbol or "unknown", {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_latency": 0.0, "last_latency": 0.0})
+            usage["calls"] += 1
+            usage["input_tokens"] += input_tokens
+            usage["output_tokens"] += output_tokens
+            usage["total_latency"] += latency
+            usage["last_latency"] = latency
+            return dict(usage)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                symbol: dict(usage, mean_latency=usage["total_latency"] / usage["calls"])
+                for symbol, usage in self._usage.items()
+            }
+
@@ -0,0 +1,197 @@
+"""
+Offline stand-ins for Alpaca, Bedrock and the search tools.
+
+FakeBroker answers the lumibot Strategy calls the bots make (prices, positions,
+orders, sell_all) from an in-process random walk, with an optional per-call
+delay to mimic network latency. StubChatModel and StubTool replace the
+LangChain Bedrock model and the DuckDuckGo / Yahoo Finance tools.
+"""
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+from trading_supervisor import load_trading_service
+
+
+@dataclass
+class FakePosition:
+    symbol: str
+    quantity: int
+
+
+@dataclass
+class FakeOrder:
+    symbol: str
+    quantity: int
+    side: str
+    type: str = "market"
+    take_profit_price: Optional[float] = None
+    stop_loss_price: Optional[float] = None
+    id: int = 0
+    status: str = "new"
+    fill_price: Optional[float] = None
+
+
+@dataclass
+class FakeBroker:
+    """
+    Fills every order immediately at the current simulated price.
+    """
+    latency: float = 0.0
+    start_price: float = 100.0
+    volatility: float = 0.001
+    seed: int = 0
+    prices: Dict[str, float] = field(default_factory=dict)
+    positions: Dict[str, int] = field(default_factory=dict)
+    orders: List[FakeOrder] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def tick(self, symbol: str) -> float:
+        """
+        Advance the symbol's random walk by one step and return the new price.
+        """
+        with self._lock:
+            price = self.prices.get(symbol, self.start_price) * (1 + self._random.gauss(0, self.volatility))
+            self.prices[symbol] = price
+            return price
+
+    def tick_all(self, symbols: Iterable[str]) -> Dict[str, float]:
+        return {symbol: self.tick(symbol) for symbol in symbols}
+
+    def get_last_price(self, symbol: str) -> float:
+        self._delay()
+        with self._lock:
+            return self.prices.setdefault(symbol, self.start_price)
+
+    def get_last_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        self._delay()
+        with self._lock:
+            return {symbol: self.prices.setdefault(symbol, self.start_price) for symbol in symbols}
+
+    def get_position(self, symbol: str) -> Optional[FakePosition]:
+        with self._lock:
+            quantity = self.positions.get(symbol, 0)
+        return FakePosition(symbol, quantity) if quantity else None
+
+    def create_order(self, symbol: str, quantity: int, side: str, **kwargs) -> FakeOrder:
+        return FakeOrder(symbol, quantity, side, **kwargs)
+
+    def submit_order(self, order: FakeOrder) -> FakeOrder:
+        self._delay()
+        with self._lock:
+            order.id = next(self._ids)
+            order.fill_price = self.prices.setdefault(order.symbol, self.start_price)
+            order.status = "filled"
+            signed = order.quantity if order.side == "buy" else -order.quantity
+            self.positions[order.symbol] = self.positions.get(order.symbol, 0) + signed
+            self.orders.append(order)
+        return order
+
+    def get_orders(self) -> List[FakeOrder]:
+        """
+        Open orders; always empty, since every order fills on submit.
+        """
+        with self._lock:
+            return [order for order in self.orders if order.status != "filled"]
+
+    def cancel_orders(self, orders: List[FakeOrder]) -> None:
+        with self._lock:
+            for order in orders:
+                order.status = "canceled"
+
+    def sell_all(self, *args, **kwargs) -> None:
+        self._delay()
+        with self._lock:
+            self.positions.clear()
+
+
+def bind_strategy(cls, broker: FakeBroker, **attributes):
+    """
+    Build a lumibot Strategy subclass without a live broker: the subclass's
+    own __init__ runs but lumibot's Strategy.__init__ is skipped, and the
+    broker-facing methods are bound to `broker`. Class attributes can be
+    overridden through `attributes`.
+    """
+    base = next(c for c in cls.__mro__ if c.__module__.startswith("lumibot"))
+    offline = type(cls.__name__, (cls, type("OfflineStrategy", (base,), {"__init__": lambda self, *args, **kwargs: None})), {})
+    strategy = offline.__new__(offline)
+    for name in ("get_last_price", "get_last_prices", "get_position", "create_order", "submit_order", "get_orders", "cancel_orders", "sell_all"):
+        setattr(strategy, name, getattr(broker, name))
+    strategy.log_message = lambda message, *args, **kwargs: None
+    for name, value in attributes.items():
+        setattr(strategy, name, value)
+    strategy.__init__()
+    return strategy
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubChatModel:
+    """
+    Stands in for ChatBedrock: `latency` seconds before the first token, then
+    `tokens` chunks `token_latency` apart.
+    """
+    def __init__(self, latency: float = 0.05, tokens: int = 40, token_latency: float = 0.0):
+        self.latency = latency
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def _chunks(self, prompt: str) -> List[str]:
+        return ['{"symbol":"X","recomendation":"HOLD","combined_analysis":"'] + ["tok "] * max(0, self.tokens - 2) + ['"}']
+
+    def invoke(self, prompt: str) -> _Message:
+        self.calls += 1
+        time.sleep(self.latency + self.token_latency * self.tokens)
+        return _Message("".join(self._chunks(prompt)))
+
+    def stream(self, prompt: str) -> Iterator[_Message]:
+        self.calls += 1
+        time.sleep(self.latency)
+        for chunk in self._chunks(prompt):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield _Message(chunk)
+
+
+class StubTool:
+    """
+    Stands in for a LangChain tool; exposes both `run` and `func`.
+    """
+    def __init__(self, latency: float = 0.02, text: str = "Stub headline. " * 20):
+        self.latency = latency
+        self.text = text
+
+    def run(self, query: str) -> str:
+        time.sleep(self.latency)
+        return self.text
+
+    func = run
+
+
+def stub_finance_agent(chain, llm_latency: float = 0.05, tool_latency: float = 0.02, tokens: int = 40) -> StubChatModel:
+    """
+    Swap the chain's lazily built LLM and tools for stubs, and skip the
+    trading-service indicator lookup; returns the LLM.
+    """
+    llm = StubChatModel(llm_latency, tokens)
+    tool = StubTool(tool_latency)
+    with chain._lock:
+        chain._llm = llm
+        chain._web_search_tool = tool
+        chain._yahoo_news = tool
+    chain.fetch_indicators = lambda symbols: {}
+    return llm
@@ -0,0 +1,75 @@
+"""
+Closed-loop load generator for the FastAPI apps, driven in-process through
+httpx's ASGI transport so no server, port or network is involved.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Throughput and latency percentiles (in milliseconds) for one scenario.
+    """
+    ordered = sorted(latencies)
+    ms = lambda value: None if value is None else value * 1000
+    return {
+        "operations": len(ordered),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(ordered) / elapsed if elapsed else None,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else None
+    }
+
+
+async def _drive(app, next_request: Callable[[int], Request], total: int, concurrency: int, offset: int = 0) -> Dict[str, Any]:
+    import httpx # type: ignore
+
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        async def worker():
+            nonlocal errors, issued
+            while issued < total:
+                method, url, body = next_request(offset + issued)
+                issued += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, json=body)
+                    await response.aread()
+                    if response.status_code >= 500:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors)
+
+
+def run_load(app, next_request: Callable[[int], Request], total: int = 1000, concurrency: int = 16, warmup: int = 20) -> Dict[str, Any]:
+    """
+    Issue `total` requests from `concurrency` concurrent clients, each sending
+    its next request as soon as the previous one completes. `next_request(i)`
+    returns (method, url, json body or None) for the i-th request; warm-up
+    requests use indices from `total` on, so they never prime measured ones.
+    """
+    if warmup:
+        asyncio.run(_drive(app, next_request, warmup, 1, offset=total))
+    return asyncio.run(_drive(app, next_request, total, concurrency))
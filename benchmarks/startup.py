@@ -0,0 +1,100 @@
+"""
+Cold-start benchmark for each entry point.
+
+Every measurement runs in a fresh interpreter so import caches are cold:
+- import: time to execute the module (what a Streamlit rerun or server boot pays);
+- startup: FastAPI startup events (TestClient enter) or the first AppTest run;
+- first_request: latency of the first request after startup.
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "trading_service": {"path": "stock-trading-ma.py", "kind": "fastapi", "request": ("GET", "/health")},
+    "finance_agent": {"path": "ai_agent_finance_team_chain.py", "kind": "fastapi", "request": ("GET", "/query/cache")},
+    "trading_dashboard": {"path": "trading_aiagent.py", "kind": "streamlit"},
+    "analysis_dashboard": {"path": "streamlit_ui.py", "kind": "streamlit"}
+}
+
+PROBE = """
+import importlib.util, json, sys, time
+sys.path.insert(0, {root!r})
+result = {{}}
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("entry_point", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+result["import"] = time.perf_counter() - started
+if {kind!r} == "fastapi":
+    from fastapi.testclient import TestClient
+    started = time.perf_counter()
+    with TestClient(module.app) as client:
+        result["startup"] = time.perf_counter() - started
+        started = time.perf_counter()
+        client.request({method!r}, {url!r})
+        result["first_request"] = time.perf_counter() - started
+else:
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file({path!r}, default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    result["startup"] = time.perf_counter() - started
+    started = time.perf_counter()
+    app.run()
+    result["first_request"] = time.perf_counter() - started
+print(json.dumps(result))
+"""
+
+
+def probe(name: str, spec: Dict, python: str = sys.executable) -> Dict[str, float]:
+    method, url = spec.get("request", ("GET", "/"))
+    code = PROBE.format(root=ROOT, path=os.path.join(ROOT, spec["path"]), kind=spec["kind"], method=method, url=url)
+    completed = subprocess.run([python, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    if completed.returncode != 0:
+        stderr = completed.stderr.strip()
+        raise RuntimeError(stderr.splitlines()[-1] if stderr else f"{name} exited with {completed.returncode}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(entry_points: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, Dict]:
+    report = {}
+    for name in entry_points or list(ENTRY_POINTS):
+        samples: Dict[str, List[float]] = {}
+        try:
+            for _ in range(repeat):
+                for phase, seconds in probe(name, ENTRY_POINTS[name]).items():
+                    samples.setdefault(phase, []).append(seconds)
+            report[name] = {phase: {"median": statistics.median(v), "min": min(v), "max": max(v)} for phase, v in samples.items()}
+        except RuntimeError as e:
+            report[name] = {"error": str(e)}
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entry_points", nargs="*", help=f"Any of: {', '.join(ENTRY_POINTS)} (default: all).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    unknown = set(args.entry_points) - set(ENTRY_POINTS)
+    if unknown:
+        parser.error(f"Unknown entry points: {', '.join(sorted(unknown))}")
+
+    report = run(args.entry_points, args.repeat)
+    for name, phases in report.items():
+        if "error" in phases:
+            print(f"{name:20s} {phases['error']}")
+            continue
+        print(f"{name:20s} " + "  ".join(f"{phase}={stats['median'] * 1000:8.1f}ms" for phase, stats in phases.items()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,314 @@
+"""
+Offline performance suite: the trading bot against a fake broker and the
+finance agent against a stub LLM and stub tools, with no network access.
+
+Each scenario runs in a fresh interpreter and reports throughput, p50/p99
+latency and memory (peak RSS and RSS growth during the run). Results are
+saved to benchmarks/results/<commit>.json so runs can be compared across
+commits:
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite swing_high_ticks trading_api --compare 1d9a155
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_OPTIONS = {
+    "ticks": 5000,
+    "iterations": 200,
+    "symbols": 500,
+    "brackets": 10000,
+    "requests": 500,
+    "concurrency": 16,
+    "broker_latency": 0.0,
+    "llm_latency": 0.05,
+    "tool_latency": 0.02
+}
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return None
+
+
+def _unlimited():
+    from order_pipeline import TokenBucket
+    return TokenBucket(rate=1e9, burst=10**9)
+
+
+def _trading_service(options: Dict[str, Any]):
+    """
+    Load stock-trading-ma.py and wire its SwingHigh to a FakeBroker the way
+    initialize_trading_bot wires it to Alpaca.
+    """
+    from benchmarks.fakes import FakeBroker, bind_strategy, load_trading_service
+    trading = load_trading_service()
+    broker = FakeBroker(latency=options["broker_latency"])
+    strategy = bind_strategy(trading.SwingHigh, broker, is_trading_enable=True)
+    trading.quote_cache = trading.QuoteCache(broker.get_last_price, ttl=0)
+    trading.attach_services(strategy, "swing_high", trading.quote_cache, limiter=_unlimited())
+    strategy.status = trading.status_snapshot
+    strategy.publish_status()
+    trading.strategy = strategy
+    return trading, broker, strategy
+
+
+def _time_loop(n: int, step: Callable[[int], None]) -> Dict[str, Any]:
+    from benchmarks.load import summarize
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        step(i)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def swing_high_ticks(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    SwingHigh.on_price per simulated tick (entries, trigger checks, status publish).
+    """
+    trading, broker, strategy = _trading_service(options)
+    result = _time_loop(options["ticks"], lambda i: strategy.on_price(broker.tick(strategy.symbol)))
+    strategy.order_pipeline.stop()
+    result["orders"] = len(broker.orders)
+    return result
+
+
+def multi_swing_high_iterations(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    MultiSwingHigh.on_trading_iteration over a watchlist of `symbols` symbols.
+    """
+    from benchmarks.fakes import FakeBroker, bind_strategy, load_trading_service
+    trading = load_trading_service()
+    broker = FakeBroker(latency=options["broker_latency"])
+    symbols = [f"S{i:04d}" for i in range(options["symbols"])]
+    strategy = bind_strategy(trading.MultiSwingHigh, broker, watchlist=symbols, is_trading_enable=True)
+    quotes = trading.QuoteCache(broker.get_last_price, ttl=0, batch_fetcher=strategy.fetch_last_prices)
+    trading.attach_services(strategy, "multi_swing_high", quotes, limiter=_unlimited())
+
+    def step(i):
+        broker.tick_all(symbols)
+        strategy.on_trading_iteration()
+    result = _time_loop(options["iterations"], step)
+    strategy.order_pipeline.stop()
+    result["orders"] = len(broker.orders)
+    return result
+
+
+def trigger_monitor_prices(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    TriggerMonitor.on_price with `brackets` open brackets spread over 50
+    random-walking symbols; fired brackets are re-armed around the current
+    price so the book size stays constant.
+    """
+    import random
+    from trigger_monitor import TriggerMonitor
+    rng = random.Random(0)
+    monitor = TriggerMonitor()
+    symbols = [f"S{i:02d}" for i in range(50)]
+    prices = dict.fromkeys(symbols, 100.0)
+
+    def arm(symbol):
+        entry = prices[symbol] * (1 + rng.gauss(0, 0.002))
+        monitor.add(symbol, 10, entry, entry * 0.995, entry * 1.015)
+    for i in range(options["brackets"]):
+        arm(symbols[i % len(symbols)])
+    fired_total = 0
+
+    def step(i):
+        nonlocal fired_total
+        symbol = symbols[i % len(symbols)]
+        prices[symbol] *= 1 + rng.gauss(0, 0.001)
+        fired = monitor.on_price(symbol, prices[symbol])
+        fired_total += len(fired)
+        for _ in fired:
+            arm(symbol)
+    result = _time_loop(options["ticks"], step)
+    result["fired"] = fired_total
+    return result
+
+
+def trading_api(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mixed /trading/* load: status, parameters, buy through the order pipeline, health.
+    """
+    from benchmarks.load import run_load
+    trading, broker, strategy = _trading_service(options)
+    mix = [
+        ("GET", "/trading/status", None),
+        ("POST", "/trading/parameters", {"quantity": 10, "stop_loss_pct": 0.995}),
+        ("POST", "/trading/control", {"action": "buy", "symbol": "SPY"}),
+        ("GET", "/health", None)
+    ]
+    result = run_load(trading.app, lambda i: mix[i % len(mix)], options["requests"], options["concurrency"])
+    strategy.order_pipeline.stop()
+    return result
+
+
+def _finance_agent(options: Dict[str, Any]):
+    from benchmarks.fakes import stub_finance_agent
+    import ai_agent_finance_team_chain as agent
+    stub_finance_agent(agent.ai_agent_chain, options["llm_latency"], options["tool_latency"])
+    return agent
+
+
+def query_api(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    POST /query with a distinct query per request (every request misses the cache).
+    """
+    from benchmarks.load import run_load
+    agent = _finance_agent(options)
+    return run_load(agent.app, lambda i: ("POST", "/query", {"query": f"S{i:05d} outlook"}), options["requests"], options["concurrency"])
+
+
+def query_api_cached(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    POST /query repeating one query, so everything after warm-up is a cache hit.
+    """
+    from benchmarks.load import run_load
+    agent = _finance_agent(options)
+    return run_load(agent.app, lambda i: ("POST", "/query", {"query": "SPY outlook"}), options["requests"], options["concurrency"])
+
+
+def query_stream(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    POST /query/stream (SSE), bypassing the cache; latency is to the last event.
+    """
+    from benchmarks.load import run_load
+    agent = _finance_agent(options)
+    return run_load(agent.app, lambda i: ("POST", "/query/stream", {"query": f"S{i:05d} outlook", "refresh": True}), options["requests"], options["concurrency"])
+
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "swing_high_ticks": swing_high_ticks,
+    "multi_swing_high_iterations": multi_swing_high_iterations,
+    "trigger_monitor_prices": trigger_monitor_prices,
+    "trading_api": trading_api,
+    "query_api": query_api,
+    "query_api_cached": query_api_cached,
+    "query_stream": query_stream
+}
+
+
+def run_child(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+    rss_before = _rss_mb()
+    result = SCENARIOS[name](options)
+    rss_after = _rss_mb()
+    result["rss_growth_mb"] = None if rss_before is None or rss_after is None else rss_after - rss_before
+    result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def run_scenario(name: str, options: Dict[str, Any], python: str = sys.executable) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [python, "-m", "benchmarks.suite", "--child", name, "--options", json.dumps(options)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if completed.returncode != 0:
+        stderr = completed.stderr.strip()
+        return {"error": stderr.splitlines()[-1] if stderr else f"{name} exited with {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=ROOT).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def run(scenarios: Optional[List[str]] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    report = {
+        **git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "scenarios": {}
+    }
+    for name in scenarios or list(SCENARIOS):
+        report["scenarios"][name] = run_scenario(name, options)
+    return report
+
+
+def save(report: Dict[str, Any], directory: str = RESULTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    name = (report.get("commit") or "unknown") + ("-dirty" if report.get("dirty") else "")
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_report(ref: str, directory: str = RESULTS_DIR) -> Dict[str, Any]:
+    path = ref if os.path.exists(ref) else os.path.join(directory, f"{ref}.json")
+    with open(path) as f:
+        return json.load(f)
+
+
+def _change(new: Optional[float], old: Optional[float]) -> str:
+    if new is None or not old:
+        return ""
+    return f"({(new - old) / old * 100:+.0f}%)"
+
+
+def format_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    lines = [f"{'scenario':30s} {'ops/s':>16s} {'p50 ms':>16s} {'p99 ms':>16s} {'max rss MB':>12s}"]
+    for name, result in report["scenarios"].items():
+        if "error" in result:
+            lines.append(f"{name:30s} {result['error']}")
+            continue
+        old = ((baseline or {}).get("scenarios") or {}).get(name) or {}
+        cells = []
+        for key, width in (("throughput_per_s", 16), ("p50_ms", 16), ("p99_ms", 16)):
+            value = result.get(key)
+            text = "-" if value is None else f"{value:.3g} {_change(value, old.get(key))}".strip()
+            cells.append(f"{text:>{width}s}")
+        lines.append(f"{name:30s} {' '.join(cells)} {result['max_rss_mb']:12.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"Any of: {', '.join(SCENARIOS)} (default: all).")
+    for key, value in DEFAULT_OPTIONS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--compare", help="Commit (results/<commit>.json) or report path to compare against.")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, json.loads(args.options))))
+        sys.exit(0)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    report = run(args.scenarios, {key: getattr(args, key) for key in DEFAULT_OPTIONS})
+    baseline = load_report(args.compare) if args.compare else None
+    print(format_report(report, baseline))
+    if not args.no_save:
+        print(f"Saved {save(report)}")
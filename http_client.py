@@ -0,0 +1,46 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Tuple
+
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "120"))
+DEFAULT_TIMEOUT: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT)
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+BACKOFF_SECONDS = 0.3
+POOL_SIZE = 20
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+RETRY_STATUSES = (502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def build_retry(total: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS) -> Retry:
+    """
+    Retry policy for idempotent requests only, with exponential backoff plus jitter.
+    """
+    kwargs = dict(total=total, backoff_factor=backoff, status_forcelist=RETRY_STATUSES, allowed_methods=IDEMPOTENT_METHODS, raise_on_status=False)
+    try:
+        return Retry(backoff_jitter=backoff, **kwargs)
+    except TypeError:
+        return Retry(**kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide session with a keep-alive connection pool and retries.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=build_retry())
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+
+INDICATORS = ("sma", "ema", "vwap", "atr", "rsi", "rolling_high", "rolling_low")
+
+
+class IndicatorBook:
+    """
+    Incremental SMA, EMA, VWAP, ATR, RSI and rolling high/low for many symbols.
+    State is columnar like SwingBook: running sums, Wilder averages and
+    fixed-size ring buffers, so each bar costs O(1) per symbol and a whole
+    watchlist updates in a few vectorized operations. Values are NaN until an
+    indicator has seen enough bars.
+    """
+    _COLUMNS = ("bars", "last_close", "sma_sum", "ema", "pv_sum", "volume_sum", "atr_value", "avg_gain", "avg_loss", "high_value", "low_value")
+
+    def __init__(self, symbols: Iterable[str] = (), sma_period: int = 20, ema_period: int = 20, atr_period: int = 14, rsi_period: int = 14, range_period: int = 20):
+        if min(sma_period, ema_period, atr_period, rsi_period, range_period) < 1:
+            raise ValueError("Indicator periods must be at least 1.")
+        self.sma_period = sma_period
+        self.ema_period = ema_period
+        self.atr_period = atr_period
+        self.rsi_period = rsi_period
+        self.range_period = range_period
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.bars = np.empty(0, dtype=np.int64)
+        for name in self._COLUMNS[1:]:
+            setattr(self, name, np.empty(0, dtype=np.float64))
+        self.close_ring = np.empty((0, sma_period), dtype=np.float64)
+        self.high_ring = np.empty((0, range_period), dtype=np.float64)
+        self.low_ring = np.empty((0, range_period), dtype=np.float64)
+        self.add_symbols(symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def add_symbols(self, symbols: Iterable[str]) -> List[str]:
+        new = []
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol not in self.index and symbol not in new:
+                new.append(symbol)
+        if not new:
+            return new
+        n = len(new)
+        self.bars = np.concatenate([self.bars, np.zeros(n, dtype=np.int64)])
+        for name in self._COLUMNS[1:]:
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(n)]))
+        self.high_value[-n:] = -np.inf
+        self.low_value[-n:] = np.inf
+        self.last_close[-n:] = np.nan
+        self.close_ring = np.concatenate([self.close_ring, np.zeros((n, self.sma_period))])
+        self.high_ring = np.concatenate([self.high_ring, np.zeros((n, self.range_period))])
+        self.low_ring = np.concatenate([self.low_ring, np.zeros((n, self.range_period))])
+        for symbol in new:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return new
+
+    def remove_symbols(self, symbols: Iterable[str]) -> List[str]:
+        removed = [s.upper() for s in symbols if s.upper() in self.index]
+        if not removed:
+            return removed
+        keep = np.ones(len(self.symbols), dtype=bool)
+        keep[[self.index[s] for s in removed]] = False
+        for name in self._COLUMNS + ("close_ring", "high_ring", "low_ring"):
+            setattr(self, name, getattr(self, name)[keep])
+        self.symbols = [s for s, k in zip(self.symbols, keep) if k]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        return removed
+
+    def rows(self, symbols: Sequence[str]) -> np.ndarray:
+        """
+        Row of each symbol, adding symbols not seen before.
+        """
+        self.add_symbols(s for s in symbols if s.upper() not in self.index)
+        return np.fromiter((self.index[s.upper()] for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def update(self, symbols: Sequence[str], close, high=None, low=None, volume=None) -> None:
+        """
+        Apply one bar per symbol. high/low default to the close (price-only
+        ticks); symbols with a NaN close are skipped.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        high = close if high is None else np.asarray(high, dtype=np.float64)
+        low = close if low is None else np.asarray(low, dtype=np.float64)
+        volume = np.zeros_like(close) if volume is None else np.nan_to_num(np.asarray(volume, dtype=np.float64))
+        valid = ~np.isnan(close)
+        rows = self.rows(symbols)[valid]
+        if not len(rows):
+            return
+        c, h, l, v = close[valid], high[valid], low[valid], volume[valid]
+        n = self.bars[rows]
+        prev = self.last_close[rows]
+        first = n == 0
+
+        # SMA: running sum over the close ring, resummed once per lap to shed drift.
+        k = n % self.sma_period
+        evicted = np.where(n >= self.sma_period, self.close_ring[rows, k], 0.0)
+        self.close_ring[rows, k] = c
+        self.sma_sum[rows] += c - evicted
+        lap = k == self.sma_period - 1
+        self.sma_sum[rows[lap]] = self.close_ring[rows[lap]].sum(axis=1)
+
+        alpha = 2.0 / (self.ema_period + 1)
+        self.ema[rows] = np.where(first, c, self.ema[rows] + alpha * (c - self.ema[rows]))
+
+        self.pv_sum[rows] += (h + l + c) / 3.0 * v
+        self.volume_sum[rows] += v
+
+        # ATR and RSI: simple mean over the first period, then Wilder smoothing.
+        true_range = np.where(first, h - l, np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev))))
+        self.atr_value[rows] = np.where(n < self.atr_period, (self.atr_value[rows] * n + true_range) / (n + 1), self.atr_value[rows] + (true_range - self.atr_value[rows]) / self.atr_period)
+        change = np.where(first, 0.0, c - prev)
+        changes = np.maximum(n - 1, 0)
+        for column, move in (("avg_gain", np.maximum(change, 0.0)), ("avg_loss", np.maximum(-change, 0.0))):
+            avg = getattr(self, column)
+            avg[rows] = np.where(first, 0.0, np.where(changes < self.rsi_period, (avg[rows] * changes + move) / (changes + 1), avg[rows] + (move - avg[rows]) / self.rsi_period))
+
+        # Rolling high/low: the extreme only needs a rescan when it leaves the window.
+        k = n % self.range_period
+        full = n >= self.range_period
+        for ring, column, value, better in ((self.high_ring, "high_value", h, np.maximum), (self.low_ring, "low_value", l, np.minimum)):
+            current = getattr(self, column)
+            old = current[rows]
+            left = ring[rows, k]
+            ring[rows, k] = value
+            updated = better(old, value)
+            stale = full & (left == old) & (better(value, old) != value)
+            if stale.any():
+                stale_rows = rows[stale]
+                updated[stale] = ring[stale_rows].max(axis=1) if better is np.maximum else ring[stale_rows].min(axis=1)
+            current[rows] = updated
+
+        self.last_close[rows] = c
+        self.bars[rows] = n + 1
+
+    def update_symbol(self, symbol: str, close: float, high: Optional[float] = None, low: Optional[float] = None, volume: float = 0.0) -> None:
+        self.update([symbol], [close], [close if high is None else high], [close if low is None else low], [volume])
+
+    def new_session(self, symbols: Optional[Iterable[str]] = None) -> None:
+        """
+        Restart VWAP accumulation, e.g. at the end of each trading day.
+        """
+        rows = slice(None) if symbols is None else self.rows(list(symbols))
+        self.pv_sum[rows] = 0.0
+        self.volume_sum[rows] = 0.0
+
+    def column(self, name: str, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        One indicator for every symbol (or the given ones, in order).
+        """
+        rows = slice(None) if symbols is None else self.rows(symbols)
+        n = self.bars[rows]
+        if name == "sma":
+            return np.where(n >= self.sma_period, self.sma_sum[rows] / self.sma_period, np.nan)
+        if name == "ema":
+            return np.where(n >= self.ema_period, self.ema[rows], np.nan)
+        if name == "vwap":
+            volume = self.volume_sum[rows]
+            return np.divide(self.pv_sum[rows], volume, out=np.full(volume.shape, np.nan), where=volume > 0)
+        if name == "atr":
+            return np.where(n >= self.atr_period, self.atr_value[rows], np.nan)
+        if name == "rsi":
+            gain, loss = self.avg_gain[rows], self.avg_loss[rows]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), np.where(gain > 0, 100.0, 50.0))
+            return np.where(n > self.rsi_period, rsi, np.nan)
+        if name in ("rolling_high", "rolling_low"):
+            values = (self.high_value if name == "rolling_high" else self.low_value)[rows]
+            return np.where(n > 0, values, np.nan)
+        raise ValueError(f"Unknown indicator: {name}")
+
+    def value(self, symbol: str, name: str) -> Optional[float]:
+        if symbol.upper() not in self.index:
+            return None
+        value = float(self.column(name, [symbol])[0])
+        return None if np.isnan(value) else value
+
+    def snapshot(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        symbols = [s.upper() for s in (self.symbols if symbols is None else symbols) if s.upper() in self.index]
+        if not symbols:
+            return {}
+        columns = {name: self.column(name, symbols) for name in INDICATORS}
+        closes = self.last_close[self.rows(symbols)]
+        bars = self.bars[self.rows(symbols)]
+        result = {}
+        for i, symbol in enumerate(symbols):
+            entry = {"close": None if np.isnan(closes[i]) else round(float(closes[i]), 4), "bars": int(bars[i])}
+            for name, values in columns.items():
+                entry[name] = None if np.isnan(values[i]) else round(float(values[i]), 4)
+            result[symbol] = entry
+        return result
@@ -0,0 +1,314 @@
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram in seconds.
+    """
+    DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-th quantile.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total, counts = self.count, self.sum, list(self.counts)
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts))
+        }
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """
+    Named histograms, counters and callback gauges, rendered in the Prometheus
+    text format. Lookups of existing series take no lock.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Tuple], Any] = {}
+        self._meta: Dict[str, Tuple[str, str]] = {}
+
+    def _get(self, kind: str, name: str, help: str, labels: Dict[str, Any], factory: Callable[[], Any]):
+        key = (name, _label_key(labels))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = factory()
+                    self._meta.setdefault(name, (kind, help))
+        return series
+
+    def histogram(self, name: str, help: str = "", **labels) -> LatencyHistogram:
+        return self._get("histogram", name, help, labels, LatencyHistogram)
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get("counter", name, help, labels, Counter)
+
+    def gauge(self, name: str, fn: Callable[[], Optional[float]], help: str = "", **labels) -> None:
+        """
+        Register a gauge read from `fn` at scrape time; re-registering replaces it.
+        """
+        with self._lock:
+            self._series[(name, _label_key(labels))] = fn
+            self._meta.setdefault(name, ("gauge", help))
+
+    def register(self, name: str, histogram: LatencyHistogram, help: str = "", **labels) -> None:
+        """
+        Expose a histogram owned by another component, such as an order pipeline.
+        """
+        with self._lock:
+            self._series[(name, _label_key(labels))] = histogram
+            self._meta.setdefault(name, ("histogram", help))
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            meta = dict(self._meta)
+        lines: List[str] = []
+        current = None
+        for (name, key), metric in series:
+            kind, help = meta[name]
+            if name != current:
+                current = name
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                with metric._lock:
+                    counts, count, total = list(metric.counts), metric.count, metric.sum
+                cumulative = 0
+                for bound, n in zip(list(metric.buckets) + ["+Inf"], counts):
+                    cumulative += n
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+            elif kind == "counter":
+                lines.append(f"{name}{_format_labels(key)} {metric.value}")
+            else:
+                try:
+                    value = metric()
+                except Exception:
+                    value = None
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(key)} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class timed:
+    """
+    Observe elapsed wall time into a registry histogram, as a context manager
+    or a decorator:
+
+        with timed("trading_price_fetch_seconds", strategy="swing_high"):
+            ...
+    """
+    def __init__(self, name: str, help: str = "", registry: MetricsRegistry = REGISTRY, **labels):
+        self.histogram = registry.histogram(name, help, **labels)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        histogram = self.histogram
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+
+
+class SamplingProfiler:
+    """
+    Opt-in wall-clock profiler: a background thread samples every other
+    thread's stack with sys._current_frames() and counts collapsed stacks
+    (root;...;leaf), the input format of flame graph tools. Nothing runs
+    until start() is called.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.interval = 0.01
+        self.reset()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks: StackCounter = StackCounter()
+            self.samples = 0
+            self.started_at: Optional[float] = None
+            self.stopped_at: Optional[float] = None
+
+    def start(self, interval: float = 0.01, duration: Optional[float] = None) -> bool:
+        """
+        Start sampling every `interval` seconds, stopping by itself after
+        `duration` seconds if given. Returns False if already running.
+        """
+        if self.running:
+            return False
+        self.reset()
+        self.interval = max(0.001, interval)
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(duration,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> bool:
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join()
+        return True
+
+    def _run(self, duration: Optional[float]) -> None:
+        me = threading.get_ident()
+        deadline = None if duration is None else time.monotonic() + duration
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            stacks = self.stacks.most_common()
+            samples = self.samples
+        leaves: StackCounter = StackCounter()
+        for stack, n in stacks:
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": samples,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "top_functions": [{"function": f, "samples": n} for f, n in leaves.most_common(limit)],
+            "top_stacks": [{"stack": s, "samples": n} for s, n in stacks[:limit]]
+        }
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {n}\n" for stack, n in self.stacks.items())
+
+
+profiler = SamplingProfiler()
+
+
+def metrics_router(registry: MetricsRegistry = REGISTRY, sampler: SamplingProfiler = profiler):
+    """
+    FastAPI router with GET /metrics and the /debug/profiler toggle.
+    """
+    from fastapi import APIRouter # type: ignore
+    from fastapi.responses import PlainTextResponse # type: ignore
+
+    router = APIRouter()
+
+    @router.get("/metrics", response_class=PlainTextResponse)
+    def get_metrics():
+        return registry.render()
+
+    @router.get("/debug/profiler")
+    def get_profile(limit: int = 20):
+        return sampler.report(limit)
+
+    @router.get("/debug/profiler/collapsed", response_class=PlainTextResponse)
+    def get_collapsed_profile():
+        return sampler.collapsed()
+
+    @router.post("/debug/profiler")
+    def toggle_profiler(action: str, interval: float = 0.01, duration: Optional[float] = None):
+        from fastapi import HTTPException # type: ignore
+        if action == "start":
+            return {"started": sampler.start(interval, duration), "interval": sampler.interval}
+        if action == "stop":
+            return {"stopped": sampler.stop(), "samples": sampler.samples}
+        raise HTTPException(status_code=400, detail="Action must be 'start' or 'stop'.")
+
+    return router
@@ -0,0 +1,173 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class OrderQueueFull(Exception):
+    pass
+
+
+@dataclass
+class OrderIntent:
+    symbol: str
+    quantity: int
+    side: str
+    type: str = "market"
+    take_profit_price: Optional[float] = None
+    stop_loss_price: Optional[float] = None
+    client_order_id: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; share one instance between pipelines that talk
+    to the same broker account.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class OrderPipeline:
+    """
+    Single-consumer order queue in front of the broker. Orders are deduplicated
+    by client order ID, drained in batches paced by a token bucket so bursts
+    stay under the broker rate limit, and rejected once `max_pending` orders
+    are waiting. `on_failure` is called with the intent and the error for
+    every order the broker call rejects.
+    """
+    def __init__(self, submit: Callable[[OrderIntent], Any], max_pending: int = 100, rate_per_second: float = 3.0, burst: int = 5, batch_size: int = 10, dedup_ttl: float = 300.0, limiter: Optional[TokenBucket] = None, on_failure: Optional[Callable[[OrderIntent, Exception], None]] = None):
+        self.submit_fn = submit
+        self.on_failure = on_failure
+        self.batch_size = batch_size
+        self.dedup_ttl = dedup_ttl
+        self._queue: "queue.Queue[OrderIntent]" = queue.Queue(maxsize=max_pending)
+        self._limiter = limiter or TokenBucket(rate_per_second, burst)
+        self._seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.submit_to_ack = LatencyHistogram()
+        self.broker_latency = LatencyHistogram()
+        self.submitted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="order-pipeline", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @staticmethod
+    def client_order_id(symbol: str, side: str, bucket_seconds: int = 60) -> str:
+        """
+        Deterministic ID for "one order per symbol and side per bar", so retries
+        and overlapping triggers within the same bar collapse to one order.
+        Used when the intent has no ID; strategies key entries on their signal.
+        """
+        return f"{symbol}-{side}-{int(time.time() // bucket_seconds)}"
+
+    def submit(self, intent: OrderIntent, timeout: float = 0.0) -> Optional[str]:
+        """
+        Enqueue an order. Returns its client order ID, or None if an order with
+        the same ID was already accepted. Raises OrderQueueFull when the queue
+        stays full for `timeout` seconds.
+        """
+        if intent.client_order_id is None:
+            intent.client_order_id = self.client_order_id(intent.symbol, intent.side)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._seen) > 1024:
+                self._seen = {k: t for k, t in self._seen.items() if t > now}
+            expiry = self._seen.get(intent.client_order_id)
+            if expiry is not None and expiry > now:
+                self.duplicates += 1
+                return None
+            self._seen[intent.client_order_id] = now + self.dedup_ttl
+        try:
+            if timeout > 0:
+                self._queue.put(intent, timeout=timeout)
+            else:
+                self._queue.put_nowait(intent)
+        except queue.Full:
+            with self._lock:
+                self._seen.pop(intent.client_order_id, None)
+                self.rejected += 1
+            raise OrderQueueFull(f"Order queue is full ({self._queue.maxsize} pending).")
+        return intent.client_order_id
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for intent in batch:
+                self._limiter.acquire()
+                started = time.monotonic()
+                try:
+                    self.submit_fn(intent)
+                    acked = time.monotonic()
+                    self.broker_latency.observe(acked - started)
+                    self.submit_to_ack.observe(acked - intent.created_at)
+                    self.submitted += 1
+                except Exception as e:
+                    self.failed += 1
+                    with self._lock:
+                        self._seen.pop(intent.client_order_id, None)
+                    logger.error(f"Error submitting order {intent.client_order_id}: {e}")
+                    if self.on_failure is not None:
+                        try:
+                            self.on_failure(intent, e)
+                        except Exception as callback_error:
+                            logger.error(f"Error handling failed order {intent.client_order_id}: {callback_error}")
+                finally:
+                    self._queue.task_done()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "submitted": self.submitted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "submit_to_ack": self.submit_to_ack.snapshot(),
+            "broker_latency": self.broker_latency.snapshot()
+        }
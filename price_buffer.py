@@ -0,0 +1,96 @@
+from array import array
+from typing import List
+
+
+class PriceRingBuffer:
+    """
+    Fixed-size, preallocated ring buffer of the most recent prices.
+    """
+    def __init__(self, capacity: int = 390):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> float:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Price buffer index out of range.")
+        return self._values[(self._next - self._size + index) % self.capacity]
+
+    def append(self, price: float) -> None:
+        self._values[self._next] = price
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def last(self, n: int) -> List[float]:
+        """
+        Return the last n prices, oldest first.
+        """
+        n = min(n, self._size)
+        return [self[i] for i in range(-n, 0)]
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
+
+
+class RisingCloseDetector:
+    """
+    Incrementally tracks the run of strictly rising closes so the
+    "last N closes are rising" check costs O(1) per tick.
+    """
+    def __init__(self, window: int = 3):
+        self.set_window(window)
+        self._ticks = 0
+        self.reset()
+
+    def set_window(self, window: int) -> None:
+        if window < 2:
+            raise ValueError("Window must be at least 2.")
+        self.window = window
+
+    def reset(self) -> None:
+        self._last = None
+        self._run = 0
+        self._start = 0
+
+    def update(self, price: float) -> bool:
+        """
+        Feed the next close and return True if the last `window` closes are
+        strictly rising.
+        """
+        self._ticks += 1
+        if self._last is not None and price > self._last:
+            self._run += 1
+        else:
+            self._run = 1
+            self._start = self._ticks
+        self._last = price
+        return self._run >= self.window
+
+    @property
+    def is_rising(self) -> bool:
+        return self._run >= self.window
+
+    @property
+    def is_entry(self) -> bool:
+        """
+        True only on the tick where the current run reaches `window`.
+        """
+        return self._run == self.window
+
+    @property
+    def run_start(self) -> int:
+        """
+        Tick number at which the current run began; never reused, even
+        across reset(), so it identifies one rising run.
+        """
+        return self._start
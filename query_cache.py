@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from singleflight import SingleFlight
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: the ticker upper-cased, the rest lower-cased and
+    whitespace collapsed, so "aapl  Outlook" and "AAPL outlook" share an entry.
+    """
+    parts = query.split()
+    if not parts:
+        return ""
+    return " ".join([parts[0].upper()] + [p.lower() for p in parts[1:]])
+
+
+class QueryCache:
+    """
+    TTL + LRU cache for agent responses, optionally persisted to SQLite so
+    results survive restarts. Concurrent misses for the same key share one run.
+    """
+    def __init__(self, ttl: float = 900.0, max_entries: int = 512, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str) -> Optional[Any]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM query_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, query: str, value: Any) -> None:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO query_cache (key, value, created) VALUES (?, ?, ?)", (key, json.dumps(value), now))
+                self._db.commit()
+
+    def _store(self, key: str, value: Any, created: float) -> None:
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, query: str, compute: Callable[[], Any], refresh: bool = False) -> Any:
+        if not refresh:
+            value = self.get(query)
+            if value is not None:
+                return value
+
+        def run():
+            value = compute()
+            self.set(query, value)
+            return value
+        return self._flight.do(normalize_query(query), run)
+
+    def invalidate(self, query: Optional[str] = None) -> None:
+        with self._lock:
+            if query is None:
+                self._entries.clear()
+                if self._db is not None:
+                    self._db.execute("DELETE FROM query_cache")
+            else:
+                key = normalize_query(query)
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+            if self._db is not None:
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self._flight.shared,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "persistent": self._db is not None
+            }
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from singleflight import SingleFlight
+
+
+class QuoteCache:
+    """
+    Per-symbol last-price cache with a TTL and coalescing of concurrent fetches,
+    so the strategy loop and the API share one broker round trip per quote.
+    """
+    def __init__(self, fetcher: Callable[[str], Optional[float]], ttl: float = 5.0, ttl_overrides: Optional[Dict[str, float]] = None, batch_fetcher: Optional[Callable[[list], Dict[str, Optional[float]]]] = None):
+        self.fetcher = fetcher
+        self.batch_fetcher = batch_fetcher
+        self.ttl = ttl
+        self.ttl_overrides = dict(ttl_overrides or {})
+        self._quotes: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, symbol: str) -> float:
+        return self.ttl_overrides.get(symbol, self.ttl)
+
+    def set_ttl(self, symbol: str, ttl: float) -> None:
+        self.ttl_overrides[symbol] = ttl
+
+    def get(self, symbol: str) -> Optional[float]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._quotes.get(symbol)
+            if cached is not None and now - cached[1] < self.ttl_for(symbol):
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+        return self._flight.do(symbol, lambda: self._fetch(symbol))
+
+    def get_many(self, symbols: Iterable[str]) -> Dict[str, Optional[float]]:
+        """
+        Return quotes for all symbols, fetching every stale one in a single
+        batched broker call when a batch fetcher is configured.
+        """
+        now = time.monotonic()
+        quotes: Dict[str, Optional[float]] = {}
+        missing = []
+        with self._lock:
+            for symbol in symbols:
+                cached = self._quotes.get(symbol)
+                if cached is not None and now - cached[1] < self.ttl_for(symbol):
+                    self.hits += 1
+                    quotes[symbol] = cached[0]
+                else:
+                    self.misses += 1
+                    missing.append(symbol)
+        if missing:
+            if self.batch_fetcher is None:
+                for symbol in missing:
+                    quotes[symbol] = self._flight.do(symbol, lambda s=symbol: self._fetch(s))
+            else:
+                key = tuple(sorted(missing))
+                quotes.update(self._flight.do(key, lambda: self._fetch_many(list(key))))
+        return quotes
+
+    def _fetch_many(self, symbols: list) -> Dict[str, Optional[float]]:
+        fetched = self.batch_fetcher(symbols)
+        quotes = {symbol: fetched.get(symbol) for symbol in symbols}
+        now = time.monotonic()
+        with self._lock:
+            for symbol, price in quotes.items():
+                if price is not None:
+                    self._quotes[symbol] = (price, now)
+        return quotes
+
+    def _fetch(self, symbol: str) -> Optional[float]:
+        price = self.fetcher(symbol)
+        if price is not None:
+            self.put(symbol, price)
+        return price
+
+    def peek(self, symbol: str) -> Optional[float]:
+        """
+        Return the last cached price, however old, without fetching.
+        """
+        with self._lock:
+            cached = self._quotes.get(symbol)
+        return None if cached is None else cached[0]
+
+    def put(self, symbol: str, price: float) -> None:
+        with self._lock:
+            self._quotes[symbol] = (price, time.monotonic())
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._quotes.clear()
+            else:
+                self._quotes.pop(symbol, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self._flight.shared,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "symbols": len(self._quotes)
+            }
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Bar:
+    symbol: str
+    start: float
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+def parse_timestamp(value) -> float:
+    """
+    Epoch seconds from an RFC 3339 string (Alpaca's format) or a number.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        head, rest = value.split(".", 1)
+        digits = rest[:len(rest) - len(rest.lstrip("0123456789"))]
+        value = f"{head}.{digits[:6]}{rest[len(digits):]}"
+    stamp = datetime.fromisoformat(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+class BarAggregator:
+    """
+    Builds fixed-interval OHLCV bars from trades in O(1) per trade. A bar is
+    emitted when the first trade of the next interval arrives for that symbol;
+    late trades for an already-emitted interval are ignored.
+    """
+    def __init__(self, interval_seconds: float = 60.0, on_bar: Optional[Callable[[Bar], None]] = None):
+        self.interval = interval_seconds
+        self.on_bar = on_bar
+        self._bars: Dict[str, Bar] = {}
+
+    def add_trade(self, symbol: str, price: float, size: float, timestamp: float) -> Optional[Bar]:
+        start = timestamp - timestamp % self.interval
+        bar = self._bars.get(symbol)
+        if bar is not None and start < bar.start:
+            return None
+        if bar is not None and start == bar.start:
+            if price > bar.high:
+                bar.high = price
+            if price < bar.low:
+                bar.low = price
+            bar.close = price
+            bar.volume += size
+            return None
+        self._bars[symbol] = Bar(symbol, start, price, price, price, price, size)
+        if bar is not None:
+            if self.on_bar is not None:
+                self.on_bar(bar)
+            return bar
+        return None
+
+    def flush(self) -> List[Bar]:
+        bars = list(self._bars.values())
+        self._bars.clear()
+        if self.on_bar is not None:
+            for bar in bars:
+                self.on_bar(bar)
+        return bars
+
+
+class QuoteStream:
+    """
+    Websocket trade feed in Alpaca's market-data format. Runs its own event
+    loop on a background thread, calls `on_trade` for every trade and feeds
+    the bar aggregator. Reconnects with backoff if the connection drops.
+    """
+    def __init__(self, url: str, symbols: Iterable[str], on_trade: Optional[Callable[[str, float, float, float], None]] = None, on_bar: Optional[Callable[[Bar], None]] = None, key: Optional[str] = None, secret: Optional[str] = None, bar_seconds: float = 60.0):
+        self.url = url
+        self.symbols = set(symbols)
+        self.on_trade = on_trade
+        self.aggregator = BarAggregator(bar_seconds, on_bar)
+        self.key = key
+        self.secret = secret
+        self.trades = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), name="quote-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping = True
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def set_symbols(self, symbols: Iterable[str]) -> None:
+        symbols = set(symbols)
+        added, removed = symbols - self.symbols, self.symbols - symbols
+        self.symbols = symbols
+        if self._loop is not None and self._ws is not None:
+            if removed:
+                asyncio.run_coroutine_threadsafe(self._ws.send(json.dumps({"action": "unsubscribe", "trades": sorted(removed)})), self._loop)
+            if added:
+                asyncio.run_coroutine_threadsafe(self._ws.send(json.dumps({"action": "subscribe", "trades": sorted(added)})), self._loop)
+
+    async def run(self) -> None:
+        import websockets # type: ignore
+        self._loop = asyncio.get_running_loop()
+        backoff = 1.0
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    self._ws = ws
+                    if self.key:
+                        await ws.send(json.dumps({"action": "auth", "key": self.key, "secret": self.secret}))
+                    await ws.send(json.dumps({"action": "subscribe", "trades": sorted(self.symbols)}))
+                    backoff = 1.0
+                    async for message in ws:
+                        self.handle_message(message)
+                    if not self._stopping:
+                        logger.error("Quote stream closed by server")
+            except Exception as e:
+                logger.error(f"Quote stream error: {e}")
+            finally:
+                self._ws = None
+            if not self._stopping:
+                logger.info(f"Reconnecting quote stream in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def handle_message(self, message) -> None:
+        for event in json.loads(message):
+            kind = event.get("T")
+            if kind == "t":
+                if event["S"] not in self.symbols:
+                    continue
+                timestamp = parse_timestamp(event["t"])
+                self.trades += 1
+                if self.on_trade is not None:
+                    self.on_trade(event["S"], event["p"], event.get("s", 0), timestamp)
+                self.aggregator.add_trade(event["S"], event["p"], event.get("s", 0), timestamp)
+            elif kind == "error":
+                logger.error(f"Quote stream error message: {event}")
+
+
+def load_trades(path: str) -> List[Dict]:
+    """
+    Recorded trades from a CSV with timestamp, symbol, price and size columns.
+    """
+    with open(path, newline="") as f:
+        rows = [
+            {"T": "t", "S": row["symbol"].upper(), "p": float(row["price"]), "s": float(row.get("size") or 0), "t": row["timestamp"]}
+            for row in csv.DictReader(f)
+        ]
+    rows.sort(key=lambda row: parse_timestamp(row["t"]))
+    return rows
+
+
+class ReplayServer:
+    """
+    Local websocket server that speaks enough of Alpaca's stream protocol to
+    replay recorded trades to a QuoteStream. `speed` compresses time (60 plays
+    a minute of trades per second); 0 replays as fast as possible.
+    """
+    def __init__(self, trades: List[Dict], host: str = "127.0.0.1", port: int = 8765, speed: float = 0.0):
+        self.trades = trades
+        self.host = host
+        self.port = port
+        self.speed = speed
+
+    async def handler(self, ws, *args) -> None:
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        subscribed = set()
+        while not subscribed:
+            request = json.loads(await ws.recv())
+            if request.get("action") == "auth":
+                await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+            elif request.get("action") == "subscribe":
+                subscribed.update(request.get("trades", []))
+                await ws.send(json.dumps([{"T": "subscription", "trades": sorted(subscribed)}]))
+        previous = None
+        for trade in self.trades:
+            if trade["S"] not in subscribed and "*" not in subscribed:
+                continue
+            timestamp = parse_timestamp(trade["t"])
+            if self.speed and previous is not None and timestamp > previous:
+                await asyncio.sleep((timestamp - previous) / self.speed)
+            previous = timestamp
+            await ws.send(json.dumps([trade]))
+        await ws.wait_closed()
+
+    async def serve(self) -> None:
+        import websockets # type: ignore
+        async with websockets.serve(self.handler, self.host, self.port):
+            await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded trades over a local Alpaca-style websocket.")
+    parser.add_argument("path", help="CSV with timestamp, symbol, price and size columns.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(ReplayServer(load_trades(args.path), args.host, args.port, args.speed).serve())
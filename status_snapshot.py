@@ -0,0 +1,22 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class StatusSnapshot:
+    """
+    Latest status published by the strategy thread. Readers get the last
+    published dict without touching the strategy or the broker.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status: Optional[Dict[str, Any]] = None
+
+    def publish(self, status: Dict[str, Any]) -> None:
+        status = dict(status, updated_at=time.time())
+        with self._lock:
+            self._status = status
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._status
@@ -1,18 +1,32 @@
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi import FastAPI, HTTPException # type: ignore
 from pydantic import BaseModel # type: ignore
-from lumibot.brokers import Alpaca
 from lumibot.strategies import Strategy
-from lumibot.traders import Trader
-from config import ALPACA_CONFIG
-from typing import Optional
+from typing import List, Optional, Tuple
+from price_buffer import PriceRingBuffer, RisingCloseDetector
+from quote_cache import QuoteCache
+from swing_book import SwingBook
+from status_snapshot import StatusSnapshot
+from order_pipeline import OrderIntent, OrderPipeline, OrderQueueFull, TokenBucket
+from quote_stream import Bar, QuoteStream
+from trigger_monitor import TriggerMonitor
+from metrics import REGISTRY, metrics_router, timed
+from trade_journal import TradeJournal
+from indicators import IndicatorBook
+import numpy as np
 import logging
-import uvicorn # type: ignore
+import os
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__) 
 
 app = FastAPI()
+app.include_router(metrics_router())
 
 class SwingHigh(Strategy):
     sleeptime = "1M"
@@ -20,93 +34,587 @@ class SwingHigh(Strategy):
     Quantity = 10
     stop_loss_pct = 0.995
     take_profit_pct = 1.015
-    data = []
+    history_size = 390
+    rising_window = 3
     order_number = 0
     is_trading_enable = False
+    quotes = None
+    status = None
+    order_pipeline = None
+    stream = None
+    stream_mode = "bar"
+    triggers = None
+    journal = None
+    atr_stop_multiple = None
+
+    def __init__(self, *args, **kwargs):
+        # Built here rather than in initialize(), which lumibot only calls
+        # once the trader runs; the control API uses this state before that.
+        super().__init__(*args, **kwargs)
+        self.data = PriceRingBuffer(self.history_size)
+        self.rising = RisingCloseDetector(self.rising_window)
+        self.indicator_book = IndicatorBook([self.symbol])
+        self.tick_lock = threading.Lock()
+        self.stream_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-eval")
+        self.pending_lock = threading.Lock()
+        self.pending_trade: Optional[float] = None
 
     def on_trading_iteration(self):
 
         if not self.is_trading_enable:
             return
+        if self.stream is not None and self.stream.connected:
+            return
         
-        entity_price = self.fetch_latest_price(self.symbol)
+        with timed("trading_price_fetch_seconds", "Quote lookup per polling tick.", strategy="swing_high"):
+            entity_price = self.quotes.get(self.symbol)
+        if entity_price is None:
+            self.log_message(f"No price available for {self.symbol}")
+            return
+        self.on_price(entity_price)
+
+    def on_stream_trade(self, symbol: str, price: float, size: float, timestamp: float):
+        if symbol != self.symbol:
+            return
+        self.quotes.put(symbol, price)
+        if self.is_trading_enable and self.stream_mode == "tick":
+            self.queue_price(price)
+
+    def on_stream_bar(self, bar: Bar):
+        if bar.symbol == self.symbol and self.is_trading_enable and self.stream_mode == "bar":
+            self.queue_price(bar.close, bar)
+
+    def queue_price(self, entity_price: float, bar: Optional[Bar] = None):
+        """
+        Hand a streamed price to the evaluation thread so broker calls never
+        run on the quote stream's event loop. Trades that arrive while one is
+        being evaluated collapse to the latest; every bar is evaluated.
+        """
+        if bar is not None:
+            self.stream_executor.submit(self.on_streamed_price, entity_price, bar)
+            return
+        with self.pending_lock:
+            scheduled = self.pending_trade is not None
+            self.pending_trade = entity_price
+        if not scheduled:
+            self.stream_executor.submit(self.on_pending_trade)
+
+    def on_pending_trade(self):
+        with self.pending_lock:
+            entity_price, self.pending_trade = self.pending_trade, None
+        self.on_streamed_price(entity_price)
+
+    def on_streamed_price(self, entity_price: float, bar: Optional[Bar] = None):
+        try:
+            self.on_price(entity_price, bar)
+        except Exception as e:
+            self.log_message(f"Error evaluating streamed price for {self.symbol}: {e}")
+
+    def on_price(self, entity_price: float, bar: Optional[Bar] = None):
+        """
+        Run the rising-pattern entry and stop/take-profit checks for one price,
+        whether it came from polling, a streamed bar or a streamed trade.
+        """
+        with self.tick_lock, timed("trading_signal_eval_seconds", "Entry and exit evaluation per price.", strategy="swing_high"):
+            self.evaluate(entity_price, bar)
+
+    def evaluate(self, entity_price: float, bar: Optional[Bar] = None):
         self.log_message(f"Symbol: {self.symbol}, Position: {self.get_position(self.symbol)}")
-        self.data.append(self.fetch_latest_price(self.symbol))
-
-        if len(self.data)>3:
-            temp = self.data[-3:]
-            if temp[-1]>temp[1]>temp[0]:
-                self.log_message(f"last 3 points for {self.symbol}: {temp}")
-                order = self.create_order(
-                    self.symbol,
-                    self.Quantity,
-                    "buy",
-                    type="bracket",
-                    take_profit_price=entity_price * self.take_profit_pct,
-                    stop_loss_price=entity_price * self.stop_loss_pct
-                )
-                self.submit_order(order)
-                self.order_number += 1
-                if self.order_number == 1:
-                    self.log_message(f"Enter price for {self.symbol}:{temp[-1]}")
-                    entity_price = temp[-1]
-            position = self.get_position(self.symbol)
-            if position:
-                if self.data[-1] < entity_price * self.stop_loss_pct:
-                    self.sell_all()
-                    self.order_number = 0
-                    self.log_message(f"Stop loss triggered for {self.symbol}")
-                elif self.data[-1] >= entity_price * self.take_profit_pct:
-                    self.sell_all()
-                    self.order_number = 0
-                    self.log_message(f"Take profit triggered for {self.symbol}")
+        self.data.append(entity_price)
+        if self.journal is not None:
+            self.journal.price(self.symbol, entity_price)
+        if bar is None:
+            self.indicator_book.update_symbol(self.symbol, entity_price)
+        else:
+            self.indicator_book.update_symbol(self.symbol, bar.close, bar.high, bar.low, bar.volume)
+        is_rising = self.rising.update(self.data[-1])
+        if self.triggers is not None and check_triggers(self, self.symbol, entity_price) and not self.triggers.open_count(self.symbol):
+            self.order_number = 0
+
+        if len(self.data) >= self.rising.window:
+            if is_rising:
+                temp = self.data.last(self.rising.window)
+                self.log_message(f"last {self.rising.window} points for {self.symbol}: {temp}")
+                if self.rising.is_entry and queue_bracket(self, self.symbol, self.Quantity, entity_price, self.take_profit_pct, self.stop_loss_pct, self.stop_price(entity_price), f"{self.symbol}-buy-run{self.rising.run_start}"):
+                    self.order_number += 1
+                    if self.order_number == 1:
+                        self.log_message(f"Enter price for {self.symbol}:{temp[-1]}")
+        self.publish_status()
+
+    def indicator_snapshot(self, symbols: Optional[List[str]] = None) -> dict:
+        with self.tick_lock:
+            return self.indicator_book.snapshot(symbols)
+
+    def stop_price(self, entity_price: float) -> Optional[float]:
+        """
+        ATR-based stop when atr_stop_multiple is set and ATR is ready;
+        None falls back to the fixed stop_loss_pct.
+        """
+        if not self.atr_stop_multiple:
+            return None
+        atr = self.indicator_book.value(self.symbol, "atr")
+        return None if atr is None else entity_price - self.atr_stop_multiple * atr
+
+    def publish_status(self):
+        if self.status is None:
+            return
+        self.status.publish({
+            "status": "Trading bot is running.",
+            "symbol": self.symbol,
+            "quantity": self.Quantity,
+            "stop_loss_pct": self.stop_loss_pct,
+            "take_profit_pct": self.take_profit_pct,
+            "rising_window": self.rising_window,
+            "atr_stop_multiple": self.atr_stop_multiple,
+            "is_trading_enable": self.is_trading_enable,
+            "order_number": self.order_number,
+            "open_brackets": self.triggers.open_count(self.symbol) if self.triggers else None,
+            "last_price": self.quotes.peek(self.symbol) if self.quotes else None,
+            "indicators": self.indicator_book.snapshot().get(self.symbol),
+            "quote_cache": self.quotes.stats() if self.quotes else None,
+            "order_pipeline": self.order_pipeline.stats() if self.order_pipeline else None
+        })
+
+    def sell_all(self, *args, **kwargs):
+        with timed("trading_sell_all_seconds", "Broker sell_all calls.", strategy="swing_high"):
+            return super().sell_all(*args, **kwargs)
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        journal_fill(self, order, price, quantity)
+        # Without a trigger monitor the broker bracket owns the exits; its
+        # exit leg filling is what flattens the position.
+        if self.triggers is None and getattr(order.asset, "symbol", None) == self.symbol and not (position and position.quantity > 0):
+            self.order_number = 0
 
     def before_market_closes(self):
         self.sell_all()
+        self.indicator_book.new_session()
+        if self.journal is not None:
+            self.journal.signal(self.symbol, self.quotes.peek(self.symbol) if self.quotes else float("nan"), "session_close")
+            self.journal.flush()
+        if self.triggers is not None:
+            self.triggers.cancel_symbol(self.symbol)
         self.is_trading_enable = False
+        self.publish_status()
 
     def update_symbol(self, symbol: str) -> bool:
         try:
-            if get_last_price(symbol):
-                if self.get_position(symbol):
-                    self.sell_all()
-                self.symbol = symbol
-                self.data = []
-                self.order_number = 0
+            if self.quotes.get(symbol):
+                with self.tick_lock:
+                    if self.get_position(symbol):
+                        self.sell_all()
+                    if self.triggers is not None:
+                        self.triggers.cancel_symbol(self.symbol)
+                    self.symbol = symbol
+                    if self.stream is not None:
+                        self.stream.set_symbols([symbol])
+                    self.data.clear()
+                    self.rising.reset()
+                    self.indicator_book.remove_symbols(self.indicator_book.symbols)
+                    self.indicator_book.add_symbols([symbol])
+                    self.order_number = 0
+                    self.publish_status()
                 return True
             return False
         except Exception as e:
             self.log_message(f"Error updating symbol: {e}")
             return False
         
-    def update_parameters(self, quantity: Optional[int] = None, stop_loss_pct: Optional[float] = None, take_profit_pct: Optional[float] = None):
+    def update_parameters(self, quantity: Optional[int] = None, stop_loss_pct: Optional[float] = None, take_profit_pct: Optional[float] = None, rising_window: Optional[int] = None, atr_stop_multiple: Optional[float] = None):
         try:
-            if quantity is not None and quantity > 0:
-                self.Quantity = quantity
-            if stop_loss_pct is not None and 0 < stop_loss_pct < 1:
-                self.stop_loss_pct = stop_loss_pct
-            if take_profit_pct is not None and take_profit_pct > 1:
-                self.take_profit_pct = take_profit_pct
+            with self.tick_lock:
+                if quantity is not None and quantity > 0:
+                    self.Quantity = quantity
+                if stop_loss_pct is not None and 0 < stop_loss_pct < 1:
+                    self.stop_loss_pct = stop_loss_pct
+                if take_profit_pct is not None and take_profit_pct > 1:
+                    self.take_profit_pct = take_profit_pct
+                if rising_window is not None and 2 <= rising_window <= self.data.capacity:
+                    self.rising_window = rising_window
+                    self.rising.set_window(rising_window)
+                if atr_stop_multiple is not None and atr_stop_multiple >= 0:
+                    self.atr_stop_multiple = atr_stop_multiple or None
+                self.publish_status()
             return True
         except Exception as e:
             self.log_message(f"Error updating parameters: {e}")
             return False
+
+@timed("trading_order_submit_seconds", "Broker create_order and submit_order per order.")
+def submit_intent(strategy: Strategy, intent: OrderIntent):
+    if intent.type == "bracket":
+        order = strategy.create_order(
+            intent.symbol,
+            intent.quantity,
+            intent.side,
+            type="bracket",
+            take_profit_price=intent.take_profit_price,
+            stop_loss_price=intent.stop_loss_price
+        )
+    else:
+        order = strategy.create_order(intent.symbol, intent.quantity, intent.side)
+    result = strategy.submit_order(order)
+    if strategy.journal is not None:
+        strategy.journal.order(intent.symbol, intent.quantity, intent.side, ref=intent.client_order_id)
+    return result
+
+def journal_fill(strategy: Strategy, order, price: float, quantity: float):
+    """
+    Record a broker fill. Fills carry the broker's order identifier, since
+    client order IDs are not sent to the broker.
+    """
+    if strategy.journal is None:
+        return
+    symbol = getattr(order.asset, "symbol", str(order.asset))
+    side = "buy" if str(order.side).lower().startswith("buy") else "sell"
+    strategy.journal.fill(symbol, float(quantity), side, float(price), ref=getattr(order, "identifier", None))
+
+def bracket_intent(strategy: Strategy, symbol: str, quantity: int, price: float, take_profit_pct: float, stop_loss_pct: float, stop_loss_price: Optional[float] = None, client_order_id: Optional[str] = None) -> OrderIntent:
+    """
+    Entry order for a bracket: a plain buy when the strategy's trigger monitor
+    owns the exits, otherwise a broker-side bracket order. An explicit
+    stop_loss_price (e.g. ATR-based) overrides stop_loss_pct.
+    """
+    return OrderIntent(
+        symbol,
+        quantity,
+        "buy",
+        type="bracket" if strategy.triggers is None else "market",
+        take_profit_price=price * take_profit_pct,
+        stop_loss_price=price * stop_loss_pct if stop_loss_price is None else stop_loss_price,
+        client_order_id=client_order_id
+    )
+
+def submit_bracket(strategy: Strategy, intent: OrderIntent, price: float) -> Optional[str]:
+    """
+    Queue a bracket entry. With a trigger monitor its exits are armed before
+    the buy is queued, so the pipeline can disarm them if the broker rejects
+    it, and disarmed again here for a duplicate or a full queue. Returns the
+    client order ID, or None for a duplicate; raises OrderQueueFull.
+    """
+    if strategy.triggers is None:
+        return strategy.order_pipeline.submit(intent)
+    if intent.client_order_id is None:
+        intent.client_order_id = strategy.order_pipeline.client_order_id(intent.symbol, intent.side)
+    bracket = strategy.triggers.add(intent.symbol, intent.quantity, price, intent.stop_loss_price, intent.take_profit_price, tag=intent.client_order_id)
+    try:
+        client_order_id = strategy.order_pipeline.submit(intent)
+    except OrderQueueFull:
+        strategy.triggers.cancel(bracket.id)
+        raise
+    if client_order_id is None:
+        strategy.triggers.cancel(bracket.id)
+    return client_order_id
+
+def disarm_bracket(strategy: Strategy, intent: OrderIntent, error: Exception):
+    """
+    Pipeline failure callback: a rejected buy leaves no shares for its
+    bracket to sell.
+    """
+    if intent.side == "buy" and strategy.triggers is not None and strategy.triggers.cancel_tag(intent.client_order_id):
+        strategy.log_message(f"Buy {intent.client_order_id} failed, exits disarmed: {error}")
+
+def queue_bracket(strategy: Strategy, symbol: str, quantity: int, price: float, take_profit_pct: float, stop_loss_pct: float, stop_loss_price: Optional[float] = None, client_order_id: Optional[str] = None) -> Optional[str]:
+    """
+    Queue a bracket buy through the strategy's order pipeline. Signal-driven
+    entries pass an ID keyed on their rising run so one run is one order.
+    Returns the client order ID, or None if it was a duplicate or the queue
+    is full.
+    """
+    intent = bracket_intent(strategy, symbol, quantity, price, take_profit_pct, stop_loss_pct, stop_loss_price, client_order_id)
+    try:
+        client_order_id = submit_bracket(strategy, intent, price)
+        if client_order_id is None:
+            REGISTRY.counter("trading_orders_skipped_total", "Orders not queued.", reason="duplicate").inc()
+            strategy.log_message(f"Duplicate buy for {symbol} skipped")
+        elif strategy.journal is not None:
+            strategy.journal.signal(symbol, price, "entry", ref=client_order_id)
+        return client_order_id
+    except OrderQueueFull as e:
+        REGISTRY.counter("trading_orders_skipped_total", "Orders not queued.", reason="queue_full").inc()
+        strategy.log_message(f"Order for {symbol} dropped: {e}")
+        return None
+
+def check_triggers(strategy: Strategy, symbol: str, price: float) -> int:
+    """
+    Queue a sell for every open bracket whose stop or target this price
+    crosses. A sell the pipeline cannot take is re-armed for the next price.
+    """
+    fired = strategy.triggers.on_price(symbol, price)
+    for bracket, reason in fired:
+        REGISTRY.counter("trading_triggers_fired_total", "Bracket exits fired by the trigger monitor.", reason=reason).inc()
+        if strategy.journal is not None:
+            strategy.journal.signal(symbol, price, reason, ref=bracket.tag)
+        intent = OrderIntent(symbol, bracket.quantity, "sell", client_order_id=f"{bracket.tag or bracket.id}-exit")
+        try:
+            strategy.order_pipeline.submit(intent)
+            strategy.log_message(f"{reason.replace('_', ' ').capitalize()} triggered for {symbol} at {price} (entry {bracket.entry_price})")
+        except OrderQueueFull as e:
+            strategy.log_message(f"Exit for {symbol} dropped, re-arming: {e}")
+            strategy.triggers.add(symbol, bracket.quantity, bracket.entry_price, bracket.stop_price, bracket.target_price, tag=bracket.tag)
+    return len(fired)
+
+class MultiSwingHigh(Strategy):
+    sleeptime = "1M"
+    watchlist: List[str] = []
+    Quantity = 10
+    stop_loss_pct = 0.995
+    take_profit_pct = 1.015
+    rising_window = 3
+    is_trading_enable = False
+    quotes = None
+    order_pipeline = None
+    triggers = None
+    journal = None
+    atr_stop_multiple = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.book = SwingBook(self.watchlist, self.Quantity, self.stop_loss_pct, self.take_profit_pct, self.rising_window)
+        self.indicator_book = IndicatorBook(self.watchlist)
+        self.book_lock = threading.Lock()
+
+    def fetch_last_prices(self, symbols: list) -> dict:
+        prices = self.get_last_prices(symbols)
+        return {getattr(asset, "symbol", asset): price for asset, price in prices.items()}
+
+    def on_trading_iteration(self):
+
+        if not self.is_trading_enable or not len(self.book):
+            return
+
+        with timed("trading_price_fetch_seconds", "Quote lookup per polling tick.", strategy="multi_swing_high"):
+            quotes = self.quotes.get_many(list(self.book.symbols))
+        with self.book_lock, timed("trading_signal_eval_seconds", "Entry and exit evaluation per price.", strategy="multi_swing_high"):
+            self.evaluate(quotes)
+
+    def evaluate(self, quotes: dict):
+        prices = np.array([np.nan if quotes.get(s) is None else quotes[s] for s in self.book.symbols], dtype=np.float64)
+        if self.journal is not None:
+            self.journal.record_prices(self.book.symbols, prices)
+        self.indicator_book.update(self.book.symbols, prices)
+        signals = self.book.step(prices, exits=False)
+        stops = prices - self.atr_stop_multiple * self.indicator_book.column("atr", self.book.symbols) if self.atr_stop_multiple else np.full(len(prices), np.nan)
+
+        for i in signals.buys:
+            symbol = self.book.symbols[i]
+            queue_bracket(self, symbol, int(self.book.quantity[i]), prices[i], self.book.take_profit_pct[i], self.book.stop_loss_pct[i], None if np.isnan(stops[i]) else stops[i], f"{symbol}-buy-run{self.book.run_start[i]}")
+            if self.book.order_number[i] == 1:
+                self.log_message(f"Enter price for {symbol}:{prices[i]}")
+        if self.triggers is not None:
+            for i in np.flatnonzero(~np.isnan(prices)):
+                symbol = self.book.symbols[i]
+                if check_triggers(self, symbol, prices[i]) and not self.triggers.open_count(symbol):
+                    self.book.close(symbol)
+
+    def update_watchlist(self, add: List[str], remove: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Add and remove symbols between iterations, selling what is held in
+        removed symbols first. Returns the symbols actually added and removed.
+        """
+        with self.book_lock:
+            for symbol in remove:
+                self.close_symbol(symbol.upper())
+            removed = self.book.remove_symbols(remove)
+            self.indicator_book.remove_symbols(removed)
+            return self.book.add_symbols(add), removed
+
+    def update_parameters(self, symbol: Optional[str] = None, quantity: Optional[int] = None, stop_loss_pct: Optional[float] = None, take_profit_pct: Optional[float] = None, rising_window: Optional[int] = None, atr_stop_multiple: Optional[float] = None) -> bool:
+        """
+        Per-symbol parameters go to one row (every row when symbol is None);
+        atr_stop_multiple applies to the whole watchlist.
+        """
+        with self.book_lock:
+            if not self.book.update_parameters(symbol, quantity, stop_loss_pct, take_profit_pct, rising_window):
+                return False
+            if atr_stop_multiple is not None and atr_stop_multiple >= 0:
+                self.atr_stop_multiple = atr_stop_multiple or None
+            return True
+
+    def book_snapshot(self) -> List[dict]:
+        with self.book_lock:
+            return self.book.snapshot()
+
+    def indicator_snapshot(self, symbols: Optional[List[str]] = None) -> dict:
+        with self.book_lock:
+            return self.indicator_book.snapshot(symbols)
+
+    def buy_symbol(self, symbol: str, entity_price: float) -> Optional[str]:
+        """
+        Manual bracket buy for one watchlist symbol with that symbol's
+        parameters. Returns the client order ID, or None for a duplicate.
+        Raises KeyError for a symbol not on the watchlist.
+        """
+        with self.book_lock:
+            row = self.book.index[symbol]
+            atr = self.indicator_book.value(symbol, "atr")
+            stop_loss_price = entity_price - self.atr_stop_multiple * atr if self.atr_stop_multiple and atr is not None else None
+            intent = bracket_intent(self, symbol, int(self.book.quantity[row]), entity_price, self.book.take_profit_pct[row], self.book.stop_loss_pct[row], stop_loss_price)
+            client_order_id = submit_bracket(self, intent, entity_price)
+            if client_order_id is not None and self.journal is not None:
+                self.journal.signal(symbol, entity_price, "manual", ref=client_order_id)
+            return client_order_id
+
+    def sell_symbol(self, symbol: str) -> bool:
+        """
+        Sell one watchlist symbol and mark it flat; False if it is not on the
+        watchlist.
+        """
+        with self.book_lock:
+            if symbol not in self.book.index:
+                return False
+            self.close_symbol(symbol)
+            self.book.close(symbol)
+            return True
+
+    def close_symbol(self, symbol: str):
+        """
+        Sell a symbol's position, first cancelling its open orders (bracket
+        exit legs, unfilled entries) the way sell_all does. Each close gets
+        its own client order ID so a second close is never deduplicated.
+        """
+        if self.triggers is not None:
+            self.triggers.cancel_symbol(symbol)
+        open_orders = [o for o in self.get_orders() if getattr(o.asset, "symbol", o.asset) == symbol]
+        if open_orders:
+            self.cancel_orders(open_orders)
+        position = self.get_position(symbol)
+        if position and position.quantity > 0:
+            try:
+                self.order_pipeline.submit(OrderIntent(symbol, position.quantity, "sell", client_order_id=f"{symbol}-close-{time.time_ns()}"))
+            except OrderQueueFull as e:
+                self.log_message(f"Sell for {symbol} dropped: {e}")
+
+    def sell_all(self, *args, **kwargs):
+        with timed("trading_sell_all_seconds", "Broker sell_all calls.", strategy="multi_swing_high"):
+            return super().sell_all(*args, **kwargs)
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        journal_fill(self, order, price, quantity)
+        # Without a trigger monitor the broker bracket owns the exits; mark
+        # the symbol flat once one of its exit legs fills.
+        symbol = getattr(order.asset, "symbol", None)
+        if self.triggers is None and not (position and position.quantity > 0):
+            with self.book_lock:
+                if symbol in self.book.index:
+                    self.book.close(symbol)
+
+    def before_market_closes(self):
+        self.sell_all()
+        with self.book_lock:
+            if self.journal is not None:
+                for symbol in self.book.symbols:
+                    self.journal.signal(symbol, float("nan"), "session_close")
+                self.journal.flush()
+            self.book.reset()
+            self.indicator_book.new_session()
+            if self.triggers is not None:
+                for symbol in self.book.symbols:
+                    self.triggers.cancel_symbol(symbol)
+        self.is_trading_enable = False
+
 trader = None
 strategy = None
+multi_strategy = None
+quote_cache = None
+status_snapshot = StatusSnapshot()
+QUOTE_TTL_SECONDS = 5.0
+QUOTE_STREAM_URL = os.environ.get("QUOTE_STREAM_URL")
+QUOTE_STREAM_MODE = os.environ.get("QUOTE_STREAM_MODE", "bar")
+BROKER_WORKERS = int(os.environ.get("BROKER_WORKERS", "4"))
+BROKER_TIMEOUT_SECONDS = float(os.environ.get("BROKER_TIMEOUT_SECONDS", "30"))
+ORDER_RATE_PER_SECOND = float(os.environ.get("ORDER_RATE_PER_SECOND", "3"))
+ORDER_QUEUE_SIZE = int(os.environ.get("ORDER_QUEUE_SIZE", "100"))
+ATR_STOP_MULTIPLE = float(os.environ.get("ATR_STOP_MULTIPLE", "0")) or None
+# Opt-in: with local exits the stops live only in this process, so a crash
+# leaves positions without protective orders at the broker.
+LOCAL_EXITS = os.environ.get("LOCAL_EXITS", "0") == "1"
+TRADE_JOURNAL_DIR = os.environ.get("TRADE_JOURNAL_DIR")
+trade_journal = TradeJournal(TRADE_JOURNAL_DIR) if TRADE_JOURNAL_DIR else None
+trigger_monitor = TriggerMonitor() if LOCAL_EXITS else None
+if trigger_monitor is not None:
+    REGISTRY.gauge("trading_open_brackets", trigger_monitor.open_count, "Brackets watched by the trigger monitor.")
+order_limiter = TokenBucket(ORDER_RATE_PER_SECOND, burst=5)
+broker_executor = ThreadPoolExecutor(max_workers=BROKER_WORKERS, thread_name_prefix="broker")
+
+async def run_broker(fn, *args, **kwargs):
+    """
+    Run a blocking broker call on the bounded broker executor so it never
+    stalls the event loop serving the control API.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(broker_executor, partial(fn, *args, **kwargs)), BROKER_TIMEOUT_SECONDS)
+WATCHLIST = [s.strip().upper() for s in os.environ.get("TRADING_WATCHLIST", "").split(",") if s.strip()]
+
+def register_metrics(name: str, strat: Strategy):
+    """
+    Expose a strategy's order pipeline and quote cache on /metrics.
+    """
+    pipeline, quotes = strat.order_pipeline, strat.quotes
+    REGISTRY.register("trading_order_submit_to_ack_seconds", pipeline.submit_to_ack, "Queue entry to broker acknowledgement.", strategy=name)
+    REGISTRY.register("trading_order_broker_seconds", pipeline.broker_latency, "Broker submit call latency in the pipeline worker.", strategy=name)
+    REGISTRY.gauge("trading_order_pending", pipeline.pending, "Orders waiting in the pipeline.", strategy=name)
+    for field in ("hits", "misses", "coalesced"):
+        REGISTRY.gauge(f"trading_quote_cache_{field}", lambda field=field: quotes.stats()[field], f"Quote cache {field}.", strategy=name)
+
+def attach_services(strat: Strategy, name: str, quotes: QuoteCache, limiter: TokenBucket = order_limiter):
+    """
+    Give a strategy its quote cache, order pipeline and trigger monitor, and
+    expose them on /metrics. Used by the bot and by the offline benchmarks.
+    """
+    strat.quotes = quotes
+    strat.order_pipeline = OrderPipeline(partial(submit_intent, strat), max_pending=ORDER_QUEUE_SIZE, limiter=limiter, on_failure=partial(disarm_bracket, strat))
+    strat.order_pipeline.start()
+    strat.triggers = trigger_monitor
+    strat.journal = trade_journal
+    register_metrics(name, strat)
 
 def initialize_trading_bot(): 
-    global trader, strategy
+    global trader, strategy, multi_strategy, quote_cache
     try:
+        from lumibot.brokers import Alpaca
+        from lumibot.traders import Trader
+        from config import ALPACA_CONFIG
         broker = Alpaca(ALPACA_CONFIG)
+        SwingHigh.atr_stop_multiple = MultiSwingHigh.atr_stop_multiple = ATR_STOP_MULTIPLE
         strategy = SwingHigh(broker=broker)
+        quote_cache = QuoteCache(strategy.get_last_price, ttl=QUOTE_TTL_SECONDS)
+        attach_services(strategy, "swing_high", quote_cache)
+        strategy.status = status_snapshot
+        strategy.publish_status()
+        if QUOTE_STREAM_URL:
+            strategy.stream_mode = QUOTE_STREAM_MODE
+            strategy.stream = QuoteStream(
+                QUOTE_STREAM_URL,
+                [strategy.symbol],
+                on_trade=strategy.on_stream_trade,
+                on_bar=strategy.on_stream_bar,
+                key=ALPACA_CONFIG.get("API_KEY"),
+                secret=ALPACA_CONFIG.get("API_SECRET")
+            )
+            strategy.stream.start()
         trader = Trader()
         trader.add_strategy(strategy)
+        if WATCHLIST:
+            MultiSwingHigh.watchlist = WATCHLIST
+            multi_strategy = MultiSwingHigh(broker=broker)
+            attach_services(multi_strategy, "multi_swing_high", QuoteCache(multi_strategy.get_last_price, ttl=QUOTE_TTL_SECONDS, batch_fetcher=multi_strategy.fetch_last_prices))
+            trader.add_strategy(multi_strategy)
         return True
     except Exception as e:
         logger.error(f"Error initializing trading bot: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    
-initialize_trading_bot()
+
+@app.on_event("startup")
+async def start_trading_bot():
+    """
+    Connect to the broker once the server is up rather than at import time,
+    so importing this module stays cheap. /trading/control retries if it fails.
+    """
+    try:
+        await run_broker(initialize_trading_bot)
+    except Exception as e:
+        logger.error(f"Trading bot not started: {e}")
 
 class symbolRequest(BaseModel):
     symbol: str
@@ -115,111 +623,187 @@ class parametersRequest(BaseModel):
     quantity: Optional[int] = None
     stop_loss_pct: Optional[float] = None
     take_profit_pct: Optional[float] = None
+    rising_window: Optional[int] = None
+    atr_stop_multiple: Optional[float] = None
 
 class controlRequest(BaseModel):
     action: str
     symbol: Optional[str] = None    
 
-@app.get("/trading/status")
+class watchlistRequest(BaseModel):
+    add: List[str] = []
+    remove: List[str] = []
+    parameters: Optional[parametersRequest] = None
+    symbol: Optional[str] = None
 
-def get_trading_status():
-    try:
-        global strategy
-        if strategy is None:
-            raise HTTPException(status_code=500, details="Trading bot is not initialized.")
-        return {
-            "status": "Trading bot is running.",
-            "symbol": strategy.symbol,
-            "quantity": strategy.Quantity,
-            "stop_loss_pct": strategy.stop_loss_pct,
-            "take_profit_pct": strategy.take_profit_pct,
-            "is_trading_enable": strategy.is_trading_enable
-        }
-    except Exception as e:
-        logger.error(f"Error getting trading status: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/trading/status")
+async def get_trading_status():
+    status = status_snapshot.read()
+    if status is None:
+        raise HTTPException(status_code=500, detail="Trading bot is not initialized.")
+    return status
 
 @app.post("/trading/symbol")
-def update_symbol(request: symbolRequest):
+async def update_symbol(request: symbolRequest):
     try:
         global strategy
         if strategy is None:
-            raise HTTPException(status_code=500, details="Trading bot is not initialized.")
-        if strategy.update_symbol(request.symbol.upper()):
+            raise HTTPException(status_code=500, detail="Trading bot is not initialized.")
+        if await run_broker(strategy.update_symbol, request.symbol.upper()):
             return {"message": f"Symbol updated to {request.symbol}"}
         else:
             raise HTTPException(status_code=400, detail="Failed to update symbol.")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating symbol: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.post("/trading/parameters")
-def update_parameters(request: parametersRequest):
+async def update_parameters(request: parametersRequest):
     try:
         global strategy
         if strategy is None:
-            raise HTTPException(status_code=500, details="Trading bot is not initialized.")
-        if strategy.update_parameters(request.quantity, request.stop_loss_pct, request.take_profit_pct):
+            raise HTTPException(status_code=500, detail="Trading bot is not initialized.")
+        if await run_broker(strategy.update_parameters, request.quantity, request.stop_loss_pct, request.take_profit_pct, request.rising_window, request.atr_stop_multiple):
             return {"message": "Parameters updated successfully."}
         else:
             raise HTTPException(status_code=400, detail="Failed to update parameters.")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating parameters: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/trading/control")
-def control_trading(request: controlRequest):
+async def control_trading(request: controlRequest):
     try:
         global strategy
         if strategy is None:
-            if not initialize_trading_bot():
-                raise HTTPException(status_code=500, details="Trading bot is not initialized.")
+            if not await run_broker(initialize_trading_bot):
+                raise HTTPException(status_code=500, detail="Trading bot is not initialized.")
         action = request.action.lower()
         symbol = request.symbol.upper() if request.symbol else None
 
         if action not in ["buy" , "sell"]:
             raise HTTPException(status_code=400, detail="Invalid action.")
 
-        if not symbol.isalnum() or len(symbol) > 5:
+        if not symbol or not symbol.isalnum() or len(symbol) > 5:
             raise HTTPException(status_code=400, detail="Invalid action.")
 
+        if strategy.symbol != symbol:
+            if not await run_broker(strategy.update_symbol, symbol):
+                raise HTTPException(status_code=400, detail="Invalid action.")
+
         if action == "buy":
-            if strategy.symbol != symbol:
-                if not strategy.update_symbol(symbol):
-                    raise HTTPException(status_code=400, detail="Invalid action.")
+            entity_price = await run_broker(quote_cache.get, symbol)
+            if entity_price is None:
+                raise HTTPException(status_code=400, detail=f"No price available for {symbol}.")
+            intent = bracket_intent(strategy, symbol, strategy.Quantity, entity_price, strategy.take_profit_pct, strategy.stop_loss_pct, strategy.stop_price(entity_price))
             try:
-                order = strategy.create_order(
-                    symbol,
-                    strategy.Quantity,
-                    "buy",
-                    type="bracket",
-                    take_profit_price=entity_price * strategy.take_profit_pct,
-                    stop_loss_price=entity_price * strategy.stop_loss_pct
-                )
-                strategy.submit_order(order)
-                return {"message": "Trading enabled."}
-            except Exception as e:
-                logger.error(f"Error controlling trading: {e}")
-                raise HTTPException(status_code=500, detail=str(e))
+                client_order_id = submit_bracket(strategy, intent, entity_price)
+            except OrderQueueFull as e:
+                raise HTTPException(status_code=429, detail=str(e))
+            if client_order_id is None:
+                return {"message": "Duplicate order ignored."}
+            if strategy.journal is not None:
+                strategy.journal.signal(symbol, entity_price, "manual", ref=client_order_id)
+            return {"message": "Trading enabled.", "client_order_id": client_order_id}
         elif action == "sell":
-            if strategy.symbol != symbol:
-                if not strategy.update_symbol(symbol):
-                    raise HTTPException(status_code=400, detail="Invalid action.")
-
-            try:
-                strategy.sell_all()
-                return {"message": "Trading enabled."}
-            except Exception as e:
-                logger.error(f"Error controlling trading: {e}")
-                raise HTTPException(status_code=500, detail=str(e))
+            await run_broker(strategy.sell_all)
+            if strategy.triggers is not None:
+                strategy.triggers.cancel_symbol(symbol)
+            return {"message": "Trading enabled."}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error controlling trading: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@app.get("/trading/watchlist")
+async def get_watchlist():
+    global multi_strategy
+    if multi_strategy is None:
+        raise HTTPException(status_code=404, detail="Watchlist trading is not enabled.")
+    return {
+        "is_trading_enable": multi_strategy.is_trading_enable,
+        "symbols": await run_broker(multi_strategy.book_snapshot),
+        "quote_cache": multi_strategy.quotes.stats(),
+        "order_pipeline": multi_strategy.order_pipeline.stats()
+    }
+
+@app.post("/trading/watchlist")
+async def update_watchlist(request: watchlistRequest):
+    global multi_strategy
+    if multi_strategy is None:
+        raise HTTPException(status_code=404, detail="Watchlist trading is not enabled.")
+    try:
+        added, removed = await run_broker(multi_strategy.update_watchlist, request.add, request.remove)
+        if request.parameters is not None:
+            params = request.parameters
+            if not await run_broker(multi_strategy.update_parameters, request.symbol, params.quantity, params.stop_loss_pct, params.take_profit_pct, params.rising_window, params.atr_stop_multiple):
+                raise HTTPException(status_code=400, detail="Unknown watchlist symbol.")
+        return {"added": added, "removed": removed, "count": len(multi_strategy.book)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating watchlist: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/trading/watchlist/control")
+async def control_watchlist(request: controlRequest):
+    """
+    Buy or sell one watchlist symbol through MultiSwingHigh, leaving
+    SwingHigh's symbol alone.
+    """
+    global multi_strategy
+    if multi_strategy is None:
+        raise HTTPException(status_code=404, detail="Watchlist trading is not enabled.")
+    action = request.action.lower()
+    symbol = request.symbol.upper() if request.symbol else None
+    if action not in ["buy", "sell"] or not symbol:
+        raise HTTPException(status_code=400, detail="Invalid action.")
+    try:
+        if action == "sell":
+            if not await run_broker(multi_strategy.sell_symbol, symbol):
+                raise HTTPException(status_code=400, detail="Unknown watchlist symbol.")
+            return {"message": f"Sold {symbol}."}
+        entity_price = await run_broker(multi_strategy.quotes.get, symbol)
+        if entity_price is None:
+            raise HTTPException(status_code=400, detail=f"No price available for {symbol}.")
+        try:
+            client_order_id = await run_broker(multi_strategy.buy_symbol, symbol, entity_price)
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Unknown watchlist symbol.")
+        except OrderQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        if client_order_id is None:
+            return {"message": "Duplicate order ignored."}
+        return {"message": "Trading enabled.", "client_order_id": client_order_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error controlling watchlist symbol: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/trading/indicators")
+async def get_indicators(symbols: Optional[str] = None):
+    """
+    Latest indicator snapshot per symbol from every running strategy, e.g.
+    /trading/indicators?symbols=SPY,QQQ.
+    """
+    requested = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+    snapshot = {}
+    for strat in (multi_strategy, strategy):
+        if strat is not None:
+            snapshot.update(await run_broker(strat.indicator_snapshot, requested))
+    return snapshot
+
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "OK"}
 
 if __name__ == "__main__":
+    import uvicorn # type: ignore
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -1,9 +1,24 @@
 import streamlit as st
-from trading_aiagent import TradingAgent 
+from trading_aiagent import TradingAgent, get_trading_agent
+
+def stream_analysis(agent: TradingAgent, query: str):
+    """
+    Yield answer tokens for st.write_stream, showing tool results as they arrive.
+    """
+    status = st.status("Gathering market data...")
+    for event in agent.analyze_market_stream(query):
+        if event["event"] == "tool":
+            status.write(f"{event['name']}: {str(event['result'])[:300]}")
+        elif event["event"] == "token":
+            status.update(label="Analyzing...", state="running")
+            yield event["text"]
+        elif event["event"] == "error":
+            st.error(event["detail"])
+    status.update(label="Analysis complete", state="complete")
 
 def main():   
     st.title('TradingAgent Dashboard')
-    agent = TradingAgent()
+    agent = get_trading_agent()
     if 'analysis' not in st.session_state:
         st.session_state.analysis = None
     if 'recommandation' not in st.session_state:
@@ -13,14 +28,13 @@ def main():
 
     user_query = st.text_input('Enter your query:', value='')
     if st.button('Analyze'):
-        with st.spinner('Analyzing...'):
-            analysis = agent.analyze_market(user_query)
-            st.session_state.analysis = analysis
-            
-            if "buy" in analysis or "sell" in analysis or "hold" in analysis:
-                st.session_state.recommandation = ("BUY" if "buy" in analysis else "SELL" if "sell" in analysis else "HOLD")
-            else:
-                st.session_state.approval_status = None	
+        analysis = st.write_stream(stream_analysis(agent, user_query)) or ""
+        st.session_state.analysis = analysis
+
+        if "buy" in analysis or "sell" in analysis or "hold" in analysis:
+            st.session_state.recommandation = ("BUY" if "buy" in analysis else "SELL" if "sell" in analysis else "HOLD")
+        else:
+            st.session_state.approval_status = None	
 
 
     if st.session_state.analysis:
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from backtest import Bars, load_bars, run_backtest
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "day_end")
+
+_bars: Dict[str, Bars] = {}
+
+
+def share_bars(bars_by_symbol: Dict[str, Bars], directory: str) -> Dict[str, Tuple[str, int]]:
+    """
+    Write each symbol's bars to one file in `directory`, laid out as six
+    contiguous 8-byte columns, so worker processes can memory-map them and
+    share the page cache instead of receiving pickled copies.
+    """
+    layout = {}
+    for symbol, bars in bars_by_symbol.items():
+        n = len(bars.close)
+        path = os.path.join(directory, f"{symbol}.bars")
+        with open(path, "wb") as f:
+            for name in FIELDS:
+                np.ascontiguousarray(getattr(bars, name), dtype=_dtype(name)).tofile(f)
+        layout[symbol] = (path, n)
+    return layout
+
+
+def _dtype(name: str):
+    if name == "timestamp":
+        return "datetime64[ns]"
+    if name == "day_end":
+        return np.int64
+    return np.float64
+
+
+def _attach(layout: Dict[str, Tuple[str, int]]) -> None:
+    for symbol, (path, n) in layout.items():
+        _bars[symbol] = Bars(*(
+            np.memmap(path, dtype=_dtype(field), mode="r", offset=8 * n * i, shape=(n,))
+            for i, field in enumerate(FIELDS)
+        ))
+
+
+def _evaluate(symbol: str, stop_loss_pct: float, take_profit_pct: float, rising_window: int, quantities: List[int]) -> List[Dict]:
+    result = run_backtest(_bars[symbol], 1, stop_loss_pct, take_profit_pct, rising_window)
+    rows = []
+    for quantity in quantities:
+        rows.append({
+            "symbol": symbol,
+            "quantity": quantity,
+            "stop_loss_pct": stop_loss_pct,
+            "take_profit_pct": take_profit_pct,
+            "rising_window": rising_window,
+            "total_pnl": result.total_pnl * quantity,
+            "n_trades": result.n_trades,
+            "win_rate": result.win_rate,
+            "max_drawdown": result.max_drawdown * quantity
+        })
+    return rows
+
+
+def run_sweep(bars_by_symbol: Dict[str, Bars], quantities: Iterable[int], stop_loss_pcts: Iterable[float], take_profit_pcts: Iterable[float], rising_windows: Iterable[int] = (3,), workers: Optional[int] = None, rank_by: str = "total_pnl", top: int = 20, stream=None) -> List[Dict]:
+    """
+    Evaluate every parameter combination for every symbol in a process pool.
+    P&L and drawdown scale linearly with quantity, so each (symbol, stop,
+    target, window) is backtested once and expanded over the quantity grid.
+    Rows are written to `stream` as they complete; the top rows are returned
+    ranked by `rank_by` (prefix with "-" to rank lower values first).
+    Symbols without bars are skipped, as an empty file cannot be mapped.
+    """
+    bars_by_symbol = {symbol: bars for symbol, bars in bars_by_symbol.items() if len(bars.close)}
+    sign = -1 if rank_by.startswith("-") else 1
+    rank_by = rank_by.lstrip("-")
+    quantities = list(quantities)
+    grid = list(itertools.product(bars_by_symbol, stop_loss_pcts, take_profit_pcts, rising_windows))
+    best: List[Tuple[float, int, Dict]] = []
+    counter = itertools.count()
+    with tempfile.TemporaryDirectory(prefix="sweep-") as directory:
+        layout = share_bars(bars_by_symbol, directory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(layout,)) as pool:
+            futures = [pool.submit(_evaluate, symbol, sl, tp, window, quantities) for symbol, sl, tp, window in grid]
+            for future in as_completed(futures):
+                for row in future.result():
+                    if stream is not None:
+                        stream(row)
+                    entry = (sign * row[rank_by], -next(counter), row)
+                    if len(best) < top:
+                        heapq.heappush(best, entry)
+                    else:
+                        heapq.heappushpop(best, entry)
+    return [row for _, _, row in sorted(best, reverse=True, key=lambda e: e[:2])]
+
+
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v]
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep SwingHigh parameters over historical bars.")
+    parser.add_argument("path", help="CSV/Parquet bars; use {symbol} in the path for one file per symbol.")
+    parser.add_argument("--symbols", default="SPY")
+    parser.add_argument("--quantity", type=_ints, default=[10])
+    parser.add_argument("--stop-loss-pct", type=_floats, default=[0.99, 0.995, 0.998])
+    parser.add_argument("--take-profit-pct", type=_floats, default=[1.005, 1.01, 1.015])
+    parser.add_argument("--rising-window", type=_ints, default=[3])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rank-by", default="total_pnl")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--results", default="sweep_results.csv", help="Every evaluated row is written here as it completes; the file is overwritten.")
+    args = parser.parse_args()
+    if min(args.rising_window, default=2) < 2:
+        parser.error("--rising-window values must be at least 2")
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    bars = {symbol: load_bars(args.path.format(symbol=symbol), symbol) for symbol in symbols}
+    empty = [symbol for symbol, symbol_bars in bars.items() if not len(symbol_bars.close)]
+    if empty:
+        print(f"No bars for {', '.join(empty)}; skipped.", file=sys.stderr)
+    with open(args.results, "w", newline="") as f:
+        writer = None
+
+        def stream(row):
+            global writer
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+
+        ranked = run_sweep(bars, args.quantity, args.stop_loss_pct, args.take_profit_pct, args.rising_window, args.workers, args.rank_by, args.top, stream)
+    print(json.dumps(ranked, indent=2))
@@ -0,0 +1,157 @@
+import numpy as np
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class SwingSignals(NamedTuple):
+    buys: np.ndarray
+    stops: np.ndarray
+    takes: np.ndarray
+
+
+class SwingBook:
+    """
+    Columnar per-symbol state for running the swing-high rule across a watchlist.
+    Every column is a NumPy array indexed by symbol position so one tick is a
+    handful of vectorized operations regardless of the number of symbols.
+    """
+    def __init__(self, symbols: Iterable[str], quantity: int = 10, stop_loss_pct: float = 0.995, take_profit_pct: float = 1.015, rising_window: int = 3):
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.last_price = np.empty(0, dtype=np.float64)
+        self.run_length = np.empty(0, dtype=np.int32)
+        self.run_start = np.empty(0, dtype=np.int64)
+        self.ticks = 0
+        self.order_number = np.empty(0, dtype=np.int32)
+        self.entry_price = np.empty(0, dtype=np.float64)
+        self.quantity = np.empty(0, dtype=np.int32)
+        self.stop_loss_pct = np.empty(0, dtype=np.float64)
+        self.take_profit_pct = np.empty(0, dtype=np.float64)
+        self.rising_window = np.empty(0, dtype=np.int32)
+        self.defaults = {
+            "quantity": quantity,
+            "stop_loss_pct": stop_loss_pct,
+            "take_profit_pct": take_profit_pct,
+            "rising_window": rising_window
+        }
+        self.add_symbols(symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def add_symbols(self, symbols: Iterable[str]) -> List[str]:
+        new = []
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol not in self.index and symbol not in new:
+                new.append(symbol)
+        if not new:
+            return new
+        n = len(new)
+        self.last_price = np.concatenate([self.last_price, np.full(n, np.nan)])
+        self.run_length = np.concatenate([self.run_length, np.zeros(n, dtype=np.int32)])
+        self.run_start = np.concatenate([self.run_start, np.zeros(n, dtype=np.int64)])
+        self.order_number = np.concatenate([self.order_number, np.zeros(n, dtype=np.int32)])
+        self.entry_price = np.concatenate([self.entry_price, np.full(n, np.nan)])
+        self.quantity = np.concatenate([self.quantity, np.full(n, self.defaults["quantity"], dtype=np.int32)])
+        self.stop_loss_pct = np.concatenate([self.stop_loss_pct, np.full(n, self.defaults["stop_loss_pct"])])
+        self.take_profit_pct = np.concatenate([self.take_profit_pct, np.full(n, self.defaults["take_profit_pct"])])
+        self.rising_window = np.concatenate([self.rising_window, np.full(n, self.defaults["rising_window"], dtype=np.int32)])
+        for symbol in new:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return new
+
+    def remove_symbols(self, symbols: Iterable[str]) -> List[str]:
+        removed = [s.upper() for s in symbols if s.upper() in self.index]
+        if not removed:
+            return removed
+        keep = np.ones(len(self.symbols), dtype=bool)
+        keep[[self.index[s] for s in removed]] = False
+        for name in ("last_price", "run_length", "run_start", "order_number", "entry_price", "quantity", "stop_loss_pct", "take_profit_pct", "rising_window"):
+            setattr(self, name, getattr(self, name)[keep])
+        self.symbols = [s for s, k in zip(self.symbols, keep) if k]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        return removed
+
+    def update_parameters(self, symbol: Optional[str] = None, quantity: Optional[int] = None, stop_loss_pct: Optional[float] = None, take_profit_pct: Optional[float] = None, rising_window: Optional[int] = None) -> bool:
+        """
+        Update parameters for one symbol, or for every symbol when symbol is None.
+        """
+        if symbol is None:
+            rows = slice(None)
+        elif symbol.upper() in self.index:
+            rows = self.index[symbol.upper()]
+        else:
+            return False
+        if quantity is not None and quantity > 0:
+            self.quantity[rows] = quantity
+        if stop_loss_pct is not None and 0 < stop_loss_pct < 1:
+            self.stop_loss_pct[rows] = stop_loss_pct
+        if take_profit_pct is not None and take_profit_pct > 1:
+            self.take_profit_pct[rows] = take_profit_pct
+        if rising_window is not None and rising_window >= 2:
+            self.rising_window[rows] = rising_window
+        return True
+
+    def step(self, prices: np.ndarray, exits: bool = True) -> SwingSignals:
+        """
+        Advance every symbol by one tick. `prices` is aligned with `symbols`;
+        NaN marks a missing quote, which resets that symbol's rising run.
+        Returns the indices that should buy, stop out and take profit; a
+        symbol buys once per rising run, on the tick the run reaches its window.
+        With exits=False stop and take-profit checks are left to the caller.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = ~np.isnan(prices)
+        rising = valid & (prices > self.last_price)
+        self.ticks += 1
+        self.run_length = np.where(rising, self.run_length + 1, np.where(valid, 1, 0)).astype(np.int32)
+        self.run_start[valid & ~rising] = self.ticks
+        self.last_price = np.where(valid, prices, np.nan)
+
+        buys = valid & (self.run_length == self.rising_window)
+        self.order_number[buys] += 1
+        first = buys & (self.order_number == 1)
+        self.entry_price[first] = prices[first]
+        if not exits:
+            empty = np.empty(0, dtype=np.intp)
+            return SwingSignals(np.flatnonzero(buys), empty, empty)
+
+        open_ = valid & (self.order_number > 0)
+        with np.errstate(invalid="ignore"):
+            stops = open_ & (prices < self.entry_price * self.stop_loss_pct)
+            takes = open_ & ~stops & (prices >= self.entry_price * self.take_profit_pct)
+        closed = stops | takes
+        self.order_number[closed] = 0
+        self.entry_price[closed] = np.nan
+        return SwingSignals(np.flatnonzero(buys), np.flatnonzero(stops), np.flatnonzero(takes))
+
+    def close(self, symbol: str) -> None:
+        """
+        Mark a symbol flat after its exits filled, keeping its rising run.
+        """
+        row = self.index[symbol.upper()]
+        self.order_number[row] = 0
+        self.entry_price[row] = np.nan
+
+    def reset(self, symbol: Optional[str] = None) -> None:
+        rows = slice(None) if symbol is None else self.index[symbol.upper()]
+        self.last_price[rows] = np.nan
+        self.run_length[rows] = 0
+        self.order_number[rows] = 0
+        self.entry_price[rows] = np.nan
+
+    def snapshot(self) -> List[Dict]:
+        return [
+            {
+                "symbol": symbol,
+                "last_price": None if np.isnan(self.last_price[i]) else float(self.last_price[i]),
+                "order_number": int(self.order_number[i]),
+                "entry_price": None if np.isnan(self.entry_price[i]) else float(self.entry_price[i]),
+                "quantity": int(self.quantity[i]),
+                "stop_loss_pct": float(self.stop_loss_pct[i]),
+                "take_profit_pct": float(self.take_profit_pct[i]),
+                "rising_window": int(self.rising_window[i])
+            }
+            for i, symbol in enumerate(self.symbols)
+        ]
@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+KINDS = ("", "price", "signal", "order", "fill")
+SIDES = ("", "buy", "sell")
+REASONS = ("", "entry", "stop_loss", "take_profit", "session_close", "manual")
+
+# One 48-byte little-endian record; RECORD and _PACK describe the same layout.
+RECORD = np.dtype([
+    ("ts", "<f8"),
+    ("kind", "u1"),
+    ("side", "u1"),
+    ("reason", "u1"),
+    ("flags", "u1"),
+    ("seq", "<u4"),
+    ("symbol", "S8"),
+    ("price", "<f8"),
+    ("quantity", "<f8"),
+    ("ref", "<u8")
+])
+_PACK = struct.Struct("<dBBBBI8sddQ")
+assert _PACK.size == RECORD.itemsize
+
+
+def ref_id(value) -> int:
+    """
+    Stable 64-bit reference for an order or bracket id of any type.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, int) and 0 <= value < 2**64:
+        return value
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "little")
+
+
+def _day(value: Union[str, date, float]) -> str:
+    if isinstance(value, (int, float)):
+        return time.strftime("%Y%m%d", time.gmtime(value))
+    if isinstance(value, date):
+        return value.strftime("%Y%m%d")
+    return value.replace("-", "")
+
+
+def segment_path(directory: str, day: Union[str, date, float]) -> str:
+    return os.path.join(directory, f"journal-{_day(day)}.bin")
+
+
+class TradeJournal:
+    """
+    Append-only journal of prices, signals, orders and fills as fixed-width
+    binary records, one segment file per UTC day. Records are buffered and
+    written in blocks; a torn final record after a crash is ignored by readers.
+    """
+    def __init__(self, directory: str, flush_bytes: int = 64 * 1024, flush_seconds: float = 1.0):
+        self.directory = directory
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._file = None
+        self._day = None
+        self._seq = 0
+        self._flushed_at = time.monotonic()
+        self.records = 0
+
+    def record(self, kind: str, symbol: str, price: float = float("nan"), quantity: float = 0.0, side: Optional[str] = None, reason: Optional[str] = None, ref=None, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._rotate(ts)
+            self._buffer += _PACK.pack(
+                ts, KINDS.index(kind), SIDES.index(side or ""), REASONS.index(reason or ""), 0,
+                self._seq & 0xFFFFFFFF, symbol.encode()[:8], price, quantity, ref_id(ref)
+            )
+            self._seq += 1
+            self.records += 1
+            self._maybe_flush()
+
+    def record_prices(self, symbols: List[str], prices: np.ndarray, ts: Optional[float] = None) -> None:
+        """
+        Record one price per symbol in a single block; NaN prices are skipped.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = ~np.isnan(prices)
+        n = int(valid.sum())
+        if not n:
+            return
+        ts = time.time() if ts is None else ts
+        block = np.zeros(n, dtype=RECORD)
+        block["ts"] = ts
+        block["kind"] = KINDS.index("price")
+        block["symbol"] = np.asarray(symbols, dtype="S8")[valid]
+        block["price"] = prices[valid]
+        with self._lock:
+            self._rotate(ts)
+            block["seq"] = (self._seq + np.arange(n)) & 0xFFFFFFFF
+            self._buffer += block.tobytes()
+            self._seq += n
+            self.records += n
+            self._maybe_flush()
+
+    def price(self, symbol: str, price: float, ts: Optional[float] = None) -> None:
+        self.record("price", symbol, price, ts=ts)
+
+    def signal(self, symbol: str, price: float, reason: str, ref=None) -> None:
+        self.record("signal", symbol, price, reason=reason, ref=ref)
+
+    def order(self, symbol: str, quantity: float, side: str, price: float = float("nan"), reason: Optional[str] = None, ref=None) -> None:
+        self.record("order", symbol, price, quantity, side, reason, ref)
+
+    def fill(self, symbol: str, quantity: float, side: str, price: float, ref=None) -> None:
+        self.record("fill", symbol, price, quantity, side, ref=ref)
+
+    def _rotate(self, ts: float) -> None:
+        day = _day(ts)
+        if day != self._day:
+            self._write()
+            if self._file is not None:
+                self._file.close()
+            self._file = open(segment_path(self.directory, day), "ab")
+            self._day = day
+
+    def _maybe_flush(self) -> None:
+        if len(self._buffer) >= self.flush_bytes or time.monotonic() - self._flushed_at >= self.flush_seconds:
+            self._write()
+
+    def _write(self) -> None:
+        if self._buffer and self._file is not None:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+        self._flushed_at = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        with self._lock:
+            self._write()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._day = None
+
+
+def days(directory: str) -> List[str]:
+    return sorted(name[len("journal-"):-len(".bin")] for name in os.listdir(directory) if name.startswith("journal-") and name.endswith(".bin"))
+
+
+def open_segment(path: str) -> np.ndarray:
+    """
+    Memory-map a segment as a read-only structured array, without copying.
+    """
+    n = os.path.getsize(path) // RECORD.itemsize
+    if not n:
+        return np.empty(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", shape=(n,))
+
+
+def read_day(directory: str, day: Union[str, date, float]) -> np.ndarray:
+    return open_segment(segment_path(directory, day))
+
+
+def select(records: np.ndarray, kind: Optional[str] = None, symbol: Optional[str] = None) -> np.ndarray:
+    mask = np.ones(len(records), dtype=bool)
+    if kind is not None:
+        mask &= records["kind"] == KINDS.index(kind)
+    if symbol is not None:
+        mask &= records["symbol"] == symbol.encode()
+    return records[mask]
+
+
+def replay_prices(records: np.ndarray, on_price: Callable[[str, float, float], None], symbol: Optional[str] = None) -> int:
+    """
+    Feed recorded prices to on_price(symbol, price, ts) in journal order, e.g.
+    replay_prices(read_day(path, day), lambda s, p, ts: strategy.on_price(p), strategy.symbol).
+    """
+    prices = select(records, "price", symbol)
+    for ts, sym, price in zip(prices["ts"].tolist(), prices["symbol"].tolist(), prices["price"].tolist()):
+        on_price(sym.decode(), price, ts)
+    return len(prices)
+
+
+def to_bars(records: np.ndarray, symbol: str):
+    """
+    Recorded prices of one symbol as backtest.Bars, for run_backtest.
+    """
+    from backtest import bars_from_arrays
+    prices = select(records, "price", symbol)
+    return bars_from_arrays((prices["ts"] * 1e9).astype("datetime64[ns]"), prices["price"])
+
+
+def to_frame(records: np.ndarray):
+    import pandas as pd # type: ignore
+    frame = pd.DataFrame({name: records[name] for name in RECORD.names})
+    frame["ts"] = pd.to_datetime(frame["ts"], unit="s", utc=True)
+    frame["symbol"] = frame["symbol"].str.decode("ascii")
+    for name, labels in (("kind", KINDS), ("side", SIDES), ("reason", REASONS)):
+        frame[name] = np.array(labels)[frame[name]]
+    return frame
+
+
+def summary(records: np.ndarray) -> Dict[str, Dict[str, int]]:
+    result: Dict[str, Dict[str, int]] = {}
+    for kind in KINDS[1:]:
+        symbols, counts = np.unique(select(records, kind)["symbol"], return_counts=True)
+        if len(symbols):
+            result[kind] = {s.decode(): int(n) for s, n in zip(symbols, counts)}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, export or backtest a day of the trade journal.")
+    parser.add_argument("directory")
+    parser.add_argument("--day", help="YYYY-MM-DD (default: latest segment).")
+    parser.add_argument("--symbol")
+    parser.add_argument("--csv", help="Write the day's records to this CSV file.")
+    parser.add_argument("--backtest", action="store_true", help="Backtest SwingHigh on the day's recorded prices for --symbol.")
+    args = parser.parse_args()
+
+    available = days(args.directory)
+    if not available:
+        parser.error(f"No journal segments in {args.directory}")
+    day = args.day or available[-1]
+    records = read_day(args.directory, day)
+    print(json.dumps({"day": _day(day), "records": len(records), "counts": summary(records)}, indent=2))
+    if args.csv:
+        to_frame(records if args.symbol is None else select(records, symbol=args.symbol)).to_csv(args.csv, index=False)
+    if args.backtest:
+        if not args.symbol:
+            parser.error("--backtest needs --symbol")
+        from backtest import run_backtest
+        print(json.dumps(run_backtest(to_bars(records, args.symbol)).summary(), indent=2))
@@ -1,31 +1,58 @@
 import streamlit as st
-import boto3
+import asyncio
 import json
 import requests
-from typing import Dict, Any
+import time
+from bedrock_prompt import BedrockPromptBuilder, UsageTracker
+from http_client import DEFAULT_TIMEOUT, get_session
+from typing import Dict, Any, Iterator, List
 
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-east-1'
-)
+@st.cache_resource
+def get_bedrock_runtime():
+    """
+    Bedrock runtime client, created on first use and shared across reruns.
+    """
+    import boto3
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-1'
+    )
 
 class TradingAgent:
-    def __init__(self):
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.session = get_session()
+        self.timeout = timeout
+        self.prompt_builder = BedrockPromptBuilder()
+        self.usage = UsageTracker()
         self.finance_team_utl = "http://localhost:8000/query"
+        self.finance_team_stream_url = "http://localhost:8000/query/stream"
+        self.finance_team_batch_url = "http://localhost:8000/query/batch"
         self.trdading_status_url = "http://localhost:8000/trading/status"
         self.trading_control_url = "http://localhost:8000/trading/control"
 
     def analyze_market(self, query:str) -> str:
         try:
-            response = requests.post(self.finance_team_utl, headers = {"Content-Type":"application/json"}, json={"query": query})
+            response = self.session.post(self.finance_team_utl, headers = {"Content-Type":"application/json"}, json={"query": query}, timeout=self.timeout)
 
             return response.json().get("response", "No response received")
         except Exception as e:
             return f"Error in analysis_market: {str(e)}"
 
+    def analyze_market_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream /query/stream as event dicts ("tool", "token", "done" or "error").
+        """
+        try:
+            with self.session.post(self.finance_team_stream_url, json={"query": query}, stream=True, timeout=self.timeout) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data: "):
+                        yield json.loads(line[len("data: "):])
+        except Exception as e:
+            yield {"event": "error", "detail": f"Error in analyze_market_stream: {str(e)}"}
+
     def get_market_analysis(self, symbol: str) -> Dict[str, Any] :
         try:
-            response = requests.post(self.finance_team_utl, headers = {"Content-Type":"application/json"}, json = {"user_query": symbol})
+            response = self.session.post(self.finance_team_utl, headers = {"Content-Type":"application/json"}, json = {"user_query": symbol}, timeout=self.timeout)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -37,9 +64,26 @@ class TradingAgent:
             st.error(f"Error in API call: {e}")
             return None
         
+    def get_batch_market_analysis(self, symbols: List[str], query: str = "outlook", max_concurrency: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze a watchlist in one request, yielding each symbol's result
+        ({"symbol", "response"} or {"symbol", "error"}) as the server finishes it.
+        """
+        payload = {"symbols": symbols, "query": query, "max_concurrency": max_concurrency}
+        try:
+            with self.session.post(self.finance_team_batch_url, json=payload, stream=True, timeout=self.timeout) as response:
+                if response.status_code != 200:
+                    yield {"event": "error", "detail": f"Error in API call: {response.status_code}"}
+                    return
+                for line in response.iter_lines(decode_unicode=True):
+                    if line:
+                        yield json.loads(line)
+        except Exception as e:
+            yield {"event": "error", "detail": f"Error in get_batch_market_analysis: {str(e)}"}
+
     def get_trading_status(self) -> Dict[str, Any]:
         try:
-            response = requests.get(self.trdading_status_url)
+            response = self.session.get(self.trdading_status_url, timeout=self.timeout)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -51,10 +95,32 @@ class TradingAgent:
             st.error(f"Error in API call: {e}")
             return None 
         
+    def json_or_error(self, response) -> Dict[str, Any]:
+        if isinstance(response, Exception):
+            st.error(f"Error in API call: {response}")
+            return None
+        if response.status_code == 200:
+            return response.json()
+        st.error(f"Error in API call: {response.status_code}")
+        return None
+
+    async def afetch_analysis_and_status(self, symbol: str):
+        """
+        Fetch market analysis and trading status concurrently. Both requests
+        run in threads on the shared session, so reruns reuse its keep-alive
+        connections; errors are reported back on the script thread.
+        """
+        responses = await asyncio.gather(
+            asyncio.to_thread(self.session.post, self.finance_team_utl, headers={"Content-Type": "application/json"}, json={"user_query": symbol}, timeout=self.timeout),
+            asyncio.to_thread(self.session.get, self.trdading_status_url, timeout=self.timeout),
+            return_exceptions=True
+        )
+        return [self.json_or_error(response) for response in responses]
+
     def update_trading_service(self, action: str, symbol: str = None) -> Dict[str, Any]:
         payload = {"action": action, "symbol": symbol}
         try:
-            response = requests.post(self.trading_control_url, json=payload, headers = {"Content-Type":"application/json"})
+            response = self.session.post(self.trading_control_url, json=payload, headers = {"Content-Type":"application/json"}, timeout=self.timeout)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -67,30 +133,64 @@ class TradingAgent:
             return None
     
     def analyze_with_bedrock(self, market_data: Dict[str, Any], trading_status: Dict[str, Any]) -> str:
-        {json.dumps(market_data, indent=2)}
-        {json.dumps(trading_status, indent=2)}
-        prompt = f"Analyze the market data and trading status to provide a summary of the market and trading status. Use the following data:\n\nMarket Data:\n{json.dumps(market_data, indent=2)}\n\nTrading Status:\n{json.dumps(trading_status, indent=2)}\n\nAssistant:"
+        body, prompt_stats = self.prompt_builder.build(market_data, trading_status)
         try:
-            response = bedrock_runtime.invoke_model(
+            started = time.perf_counter()
+            response = get_bedrock_runtime().invoke_model(
                 modelId="anthropic.claude-v2",
-                body=json.dumps({
-                    "prompt": f"\n\nHuman: Analyze the market data and trading status to provide a summary of the market and trading status. Use the following data:\n\nMarket Data:\n{json.dumps(market_data, indent=2)}\n\nTrading Status:\n{json.dumps(trading_status, indent=2)}\n\nAssistant:",
-                    "max_tokens": 1000,
-                    "messages":{"role":"user","content":prompt}
-                }),
+                body=json.dumps(body),
                 contentType="application/json",
                 accept="application/json"
             )
             response_body = json.loads(response.get("body").read())
+            usage = response_body.get("usage", {})
+            self.usage.record(
+                (trading_status or {}).get("symbol"),
+                usage.get("input_tokens", prompt_stats["estimated_input_tokens"]),
+                usage.get("output_tokens", 0),
+                time.perf_counter() - started
+            )
             return response_body['content'][0]['text']
         except Exception as e:
             st.error(f"Error in API call: {e}")
             return None
         
+    def analyze_with_bedrock_stream(self, market_data: Dict[str, Any], trading_status: Dict[str, Any]) -> Iterator[str]:
+        """
+        Same analysis as analyze_with_bedrock, yielding text as Bedrock streams it.
+        """
+        body, prompt_stats = self.prompt_builder.build(market_data, trading_status)
+        input_tokens, output_tokens = prompt_stats["estimated_input_tokens"], 0
+        try:
+            started = time.perf_counter()
+            response = get_bedrock_runtime().invoke_model_with_response_stream(
+                modelId="anthropic.claude-v2",
+                body=json.dumps(body),
+                contentType="application/json",
+                accept="application/json"
+            )
+            for event in response.get("body"):
+                chunk = json.loads(event["chunk"]["bytes"])
+                if chunk.get("type") == "message_start":
+                    input_tokens = chunk["message"].get("usage", {}).get("input_tokens", input_tokens)
+                elif chunk.get("type") == "message_delta":
+                    output_tokens = chunk.get("usage", {}).get("output_tokens", output_tokens)
+                elif chunk.get("type") == "content_block_delta":
+                    yield chunk["delta"].get("text", "")
+                elif "completion" in chunk:
+                    yield chunk["completion"]
+            self.usage.record((trading_status or {}).get("symbol"), input_tokens, output_tokens, time.perf_counter() - started)
+        except Exception as e:
+            st.error(f"Error in API call: {e}")
+
     def execute_decision(self, decision: str, symbol: str) -> Dict[str, Any]:
         if decision.lower() not in ["buy", "sell"]:
             return {"message": "Invalid decision. Must be 'buy' or 'sell'."}
         return self.update_trading_service(decision.lower(), symbol)
+
+@st.cache_resource
+def get_trading_agent() -> TradingAgent:
+    return TradingAgent()
     
 def main():
     st.title = "AI Trading Dashboard Trading Agent"	
@@ -105,14 +205,15 @@ def main():
     if 'show_approval' not in st.session_state:
         st.session_state.show_approval = False
     
-    agent = TradingAgent()
+    agent = get_trading_agent()
     symbol = st.text_input("Enter symbol for analysis", "")
     if st.button("Run Analyze"):
         with st.spinner("Analyzing..."):
-            st.session_state.market_data = agent.get_market_analysis(symbol)
-            st.session_state.Trading_status = agent.get_trading_status()
+            st.session_state.market_data, st.session_state.Trading_status = asyncio.run(agent.afetch_analysis_and_status(symbol))
             if st.session_state.market_data and st.session_state.Trading_status:
-                st.session_state.recommandation = agent.analyze_with_bedrock(st.session_state.market_data, st.session_state.Trading_status)
+                st.session_state.recommandation = st.write_stream(agent.analyze_with_bedrock_stream(st.session_state.market_data, st.session_state.Trading_status))
+                with st.expander("Bedrock usage"):
+                    st.json(agent.usage.snapshot())
             if "START" in st.session_state.recommandation or "STOP" in st.session_state.recommandation or "MAINTAIN" in st.session_state.recommandation:
                 st.session_state.decision = ("START" if "START" in st.session_state.recommandation else "STOP" if "STOP" in st.session_state.recommandation else "MAINTAIN")
                 st.session_state.show_approval = True
@@ -0,0 +1,369 @@
+import asyncio
+import importlib.util
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException # type: ignore
+from pydantic import BaseModel # type: ignore
+from metrics import metrics_router, timed
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SUPERVISOR_SYMBOLS = [s.strip().upper() for s in os.environ.get("SUPERVISOR_SYMBOLS", "SPY").split(",") if s.strip()]
+SUPERVISOR_WORKERS = int(os.environ.get("SUPERVISOR_WORKERS", str(min(len(SUPERVISOR_SYMBOLS), os.cpu_count() or 1))))
+WORKER_TIMEOUT_SECONDS = float(os.environ.get("WORKER_TIMEOUT_SECONDS", "35"))
+
+
+def load_trading_service():
+    """
+    Import stock-trading-ma.py (not importable by name because of the hyphen).
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location("trading_service", os.path.join(ROOT, "stock-trading-ma.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+WORKER_OPS = {
+    "status": lambda service, body: service.get_trading_status(),
+    "symbol": lambda service, body: service.update_symbol(service.symbolRequest(**body)),
+    "parameters": lambda service, body: service.update_parameters(service.parametersRequest(**body)),
+    "control": lambda service, body: service.control_trading(service.controlRequest(**body)),
+    "watchlist": lambda service, body: service.get_watchlist(),
+    "watchlist_update": lambda service, body: service.update_watchlist(service.watchlistRequest(**body)),
+    "watchlist_control": lambda service, body: service.control_watchlist(service.controlRequest(**body)),
+    "indicators": lambda service, body: service.get_indicators(body.get("symbols"))
+}
+
+
+def worker_main(index: int, symbols: List[str], conn, env: Dict[str, str]):
+    """
+    Worker process: a full trading service for one shard of symbols. The first
+    symbol is traded by SwingHigh, the rest by MultiSwingHigh. Requests from
+    the supervisor are (id, op, body) tuples answered with (id, status, result);
+    they are handled concurrently by the service's own endpoint functions, so
+    validation and errors match the single-process API.
+    """
+    os.environ.update(env)
+    service = load_trading_service()
+    if symbols:
+        service.SwingHigh.symbol = symbols[0]
+    send_lock = threading.Lock()
+
+    async def handle(request_id, op, body):
+        try:
+            status, result = 200, await WORKER_OPS[op](service, body)
+        except HTTPException as e:
+            status, result = e.status_code, {"detail": e.detail}
+        except Exception as e:
+            logger.error(f"Worker {index} error in {op}: {e}")
+            status, result = 500, {"detail": str(e)}
+        with send_lock:
+            conn.send((request_id, status, result))
+
+    async def serve():
+        await service.start_trading_bot()
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        while True:
+            try:
+                message = await loop.run_in_executor(None, conn.recv)
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            task = loop.create_task(handle(*message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    asyncio.run(serve())
+
+
+class WorkerHandle:
+    """
+    One worker process and the multiplexed pipe to it: any number of requests
+    can be in flight, and a reader thread resolves each by its request id.
+    """
+    def __init__(self, index: int, symbols: List[str], env: Dict[str, str], context=None):
+        self.index = index
+        self.primary: Optional[str] = symbols[0] if symbols else None
+        self.watchlist: List[str] = list(symbols[1:])
+        self.env = env
+        self.context = context or multiprocessing.get_context("spawn")
+        self.process = None
+        self.restarts = 0
+        self.start()
+
+    def start(self) -> None:
+        parent, child = self.context.Pipe()
+        symbols = self.symbols
+        self.process = self.context.Process(target=worker_main, args=(self.index, symbols, child, self.env), name=f"trading-worker-{self.index}", daemon=True)
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._read, args=(parent,), name=f"trading-worker-{self.index}-reader", daemon=True).start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(dict.fromkeys(([self.primary] if self.primary else []) + self.watchlist))
+
+    def _read(self, conn) -> None:
+        while True:
+            try:
+                request_id, status, result = conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.get_loop().call_soon_threadsafe(_resolve, future, (status, result))
+        for request_id in list(self._pending):
+            future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.get_loop().call_soon_threadsafe(_resolve, future, (503, {"detail": f"Worker {self.index} exited."}))
+
+    async def call(self, op: str, body: Optional[Dict[str, Any]] = None, timeout: float = WORKER_TIMEOUT_SECONDS) -> Tuple[int, Any]:
+        if not self.alive:
+            logger.error(f"Worker {self.index} is not running; restarting it")
+            self.restarts += 1
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        request_id = next(self._ids)
+        self._pending[request_id] = future
+        try:
+            with timed("supervisor_worker_call_seconds", "Round trip to a worker process.", op=op):
+                with self._send_lock:
+                    self.conn.send((request_id, op, body or {}))
+                return await asyncio.wait_for(future, timeout)
+        except OSError:
+            return 503, {"detail": f"Worker {self.index} is not reachable."}
+        except asyncio.TimeoutError:
+            return 504, {"detail": f"Worker {self.index} did not answer within {timeout}s."}
+        finally:
+            self._pending.pop(request_id, None)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self.alive:
+            try:
+                with self._send_lock:
+                    self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+
+
+def _resolve(future: asyncio.Future, value) -> None:
+    if not future.done():
+        future.set_result(value)
+
+
+class TradingSupervisor:
+    """
+    Shards symbols round-robin over worker processes and tracks which worker
+    owns each symbol. Watchlist symbols are handled by the owner's
+    MultiSwingHigh; symbols no worker owns go to a worker picked by a stable
+    hash, which then trades them with its SwingHigh.
+    """
+    def __init__(self, symbols: List[str], workers: int, env: Optional[Dict[str, str]] = None):
+        workers = max(1, workers)
+        base_env = dict(env or {})
+        rate = float(os.environ.get("ORDER_RATE_PER_SECOND", "3"))
+        journal_dir = os.environ.get("TRADE_JOURNAL_DIR")
+        self.workers: List[WorkerHandle] = []
+        for i in range(workers):
+            shard = symbols[i::workers]
+            worker_env = {
+                **base_env,
+                "TRADING_WATCHLIST": ",".join(shard[1:]),
+                # The broker rate limit is per account, so each worker gets its share.
+                "ORDER_RATE_PER_SECOND": str(rate / workers)
+            }
+            if journal_dir:
+                worker_env["TRADE_JOURNAL_DIR"] = os.path.join(journal_dir, f"worker-{i}")
+            self.workers.append(WorkerHandle(i, shard, worker_env))
+
+    def owner(self, symbol: str) -> Optional[WorkerHandle]:
+        for worker in self.workers:
+            if symbol == worker.primary or symbol in worker.watchlist:
+                return worker
+        return None
+
+    def watchlist_owner(self, symbol: str) -> Optional[WorkerHandle]:
+        worker = self.owner(symbol)
+        return worker if worker is not None and symbol in worker.watchlist else None
+
+    def route(self, symbol: str) -> WorkerHandle:
+        return self.owner(symbol) or self.workers[zlib.crc32(symbol.encode()) % len(self.workers)]
+
+    def assign(self, symbol: str, worker: WorkerHandle) -> None:
+        """
+        Record that the worker's SwingHigh now trades `symbol`. Symbols that
+        already have an owner keep it.
+        """
+        if self.owner(symbol) is None:
+            worker.primary = symbol
+
+    async def broadcast(self, op: str, body: Optional[Dict[str, Any]] = None) -> List[Tuple[int, Any]]:
+        return await asyncio.gather(*(worker.call(op, body) for worker in self.workers))
+
+    async def status(self) -> Dict[str, Any]:
+        replies = await self.broadcast("status")
+        workers = []
+        for worker, (code, result) in zip(self.workers, replies):
+            workers.append({
+                "worker": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": worker.alive,
+                "restarts": worker.restarts,
+                "symbols": worker.symbols,
+                "status": result if code == 200 else None,
+                "error": None if code == 200 else result.get("detail")
+            })
+        running = sum(1 for w in workers if w["status"] is not None)
+        return {
+            "status": f"{running}/{len(workers)} workers running.",
+            "symbols": {symbol: worker.index for worker in self.workers for symbol in worker.symbols},
+            "workers": workers
+        }
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.stop()
+
+
+app = FastAPI()
+app.include_router(metrics_router())
+supervisor: Optional[TradingSupervisor] = None
+
+class symbolRequest(BaseModel):
+    symbol: str
+
+class parametersRequest(BaseModel):
+    symbol: Optional[str] = None
+    quantity: Optional[int] = None
+    stop_loss_pct: Optional[float] = None
+    take_profit_pct: Optional[float] = None
+    rising_window: Optional[int] = None
+    atr_stop_multiple: Optional[float] = None
+
+class controlRequest(BaseModel):
+    action: str
+    symbol: Optional[str] = None
+
+@app.on_event("startup")
+async def start_supervisor():
+    global supervisor
+    supervisor = TradingSupervisor(SUPERVISOR_SYMBOLS, SUPERVISOR_WORKERS)
+    logger.info(f"Started {len(supervisor.workers)} trading workers for {', '.join(SUPERVISOR_SYMBOLS)}")
+
+@app.on_event("shutdown")
+async def stop_supervisor():
+    if supervisor is not None:
+        supervisor.stop()
+
+def running_supervisor() -> TradingSupervisor:
+    if supervisor is None:
+        raise HTTPException(status_code=500, detail="Supervisor is not running.")
+    return supervisor
+
+def relay(reply: Tuple[int, Any]):
+    code, result = reply
+    if code != 200:
+        raise HTTPException(status_code=code, detail=result.get("detail"))
+    return result
+
+def valid_symbol(symbol: Optional[str]) -> str:
+    symbol = (symbol or "").strip().upper()
+    if not symbol or not symbol.isalnum() or len(symbol) > 5:
+        raise HTTPException(status_code=400, detail="Invalid symbol.")
+    return symbol
+
+@app.get("/trading/status")
+async def get_trading_status():
+    return await running_supervisor().status()
+
+@app.post("/trading/symbol")
+async def update_symbol(request: symbolRequest):
+    symbol = valid_symbol(request.symbol)
+    owner = running_supervisor().watchlist_owner(symbol)
+    if owner is not None:
+        raise HTTPException(status_code=409, detail=f"{symbol} is on worker {owner.index}'s watchlist.")
+    worker = supervisor.route(symbol)
+    result = relay(await worker.call("symbol", {"symbol": symbol}))
+    supervisor.assign(symbol, worker)
+    return {**result, "worker": worker.index}
+
+@app.post("/trading/parameters")
+async def update_parameters(request: parametersRequest):
+    """
+    Update the symbol's owner when a symbol is given (its watchlist row if
+    it is on the watchlist), otherwise every worker's SwingHigh and watchlist.
+    """
+    body = {
+        "quantity": request.quantity,
+        "stop_loss_pct": request.stop_loss_pct,
+        "take_profit_pct": request.take_profit_pct,
+        "rising_window": request.rising_window,
+        "atr_stop_multiple": request.atr_stop_multiple
+    }
+    if request.symbol:
+        symbol = valid_symbol(request.symbol)
+        worker = running_supervisor().owner(symbol)
+        if worker is None:
+            raise HTTPException(status_code=404, detail=f"{symbol} is not traded by any worker.")
+        if symbol in worker.watchlist:
+            relay(await worker.call("watchlist_update", {"symbol": symbol, "parameters": body}))
+            return {"message": "Parameters updated successfully.", "workers": [worker.index]}
+        return {**relay(await worker.call("parameters", body)), "workers": [worker.index]}
+    replies = await running_supervisor().broadcast("parameters", body)
+    replies += await asyncio.gather(*(w.call("watchlist_update", {"parameters": body}) for w in supervisor.workers if w.watchlist))
+    for reply in replies:
+        relay(reply)
+    return {"message": "Parameters updated successfully.", "workers": [w.index for w in supervisor.workers]}
+
+@app.post("/trading/control")
+async def control_trading(request: controlRequest):
+    symbol = valid_symbol(request.symbol)
+    worker = running_supervisor().watchlist_owner(symbol)
+    if worker is not None:
+        result = relay(await worker.call("watchlist_control", {"action": request.action, "symbol": symbol}))
+        return {**result, "worker": worker.index}
+    worker = supervisor.route(symbol)
+    result = relay(await worker.call("control", {"action": request.action, "symbol": symbol}))
+    supervisor.assign(symbol, worker)
+    return {**result, "worker": worker.index}
+
+@app.get("/trading/indicators")
+async def get_indicators(symbols: Optional[str] = None):
+    snapshot = {}
+    for code, result in await running_supervisor().broadcast("indicators", {"symbols": symbols}):
+        if code == 200:
+            snapshot.update(result)
+    return snapshot
+
+@app.get("/health")
+async def health_check():
+    alive = sum(1 for w in supervisor.workers if w.alive) if supervisor else 0
+    return {"status": "OK", "workers_alive": alive}
+
+if __name__ == "__main__":
+    import uvicorn # type: ignore
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("SUPERVISOR_PORT", "8000")))
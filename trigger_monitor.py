@@ -0,0 +1,129 @@
+import bisect
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class Bracket:
+    id: int
+    symbol: str
+    quantity: int
+    entry_price: float
+    stop_price: float
+    target_price: float
+    tag: Optional[str] = None
+
+
+class _SymbolIndex:
+    """
+    Stop levels sorted ascending and target levels stored negated and sorted
+    ascending, so in both lists the crossed triggers form a contiguous tail
+    found with one bisect and removed with one slice.
+    """
+    __slots__ = ("stops", "targets", "dead")
+
+    def __init__(self):
+        self.stops: List[Tuple[float, int]] = []
+        self.targets: List[Tuple[float, int]] = []
+        self.dead = 0
+
+
+class TriggerMonitor:
+    """
+    Stop-loss / take-profit levels for every open bracket, indexed per symbol.
+    Each price finds the crossed triggers in O(log n) and fires each bracket
+    once; the other leg of a fired bracket is cancelled lazily.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._open: Dict[int, Bracket] = {}
+        self._index: Dict[str, _SymbolIndex] = {}
+        self._open_per_symbol: Dict[str, int] = {}
+
+    def add(self, symbol: str, quantity: int, entry_price: float, stop_price: float, target_price: float, tag: Optional[str] = None) -> Bracket:
+        with self._lock:
+            bracket = Bracket(next(self._ids), symbol, quantity, entry_price, stop_price, target_price, tag)
+            index = self._index.setdefault(symbol, _SymbolIndex())
+            bisect.insort(index.stops, (stop_price, bracket.id))
+            bisect.insort(index.targets, (-target_price, bracket.id))
+            self._open[bracket.id] = bracket
+            self._open_per_symbol[symbol] = self._open_per_symbol.get(symbol, 0) + 1
+            return bracket
+
+    def cancel(self, bracket_id: int) -> Optional[Bracket]:
+        with self._lock:
+            bracket = self._close(bracket_id)
+            if bracket is not None:
+                self._maybe_compact(bracket.symbol)
+            return bracket
+
+    def cancel_tag(self, tag: str) -> List[Bracket]:
+        """
+        Cancel every open bracket with this tag, e.g. the brackets of an entry
+        order the broker rejected.
+        """
+        with self._lock:
+            closed = [self._close(b.id) for b in list(self._open.values()) if b.tag == tag]
+            for symbol in {b.symbol for b in closed}:
+                self._maybe_compact(symbol)
+            return closed
+
+    def cancel_symbol(self, symbol: str) -> List[Bracket]:
+        with self._lock:
+            index = self._index.pop(symbol, None)
+            if index is None:
+                return []
+            closed = [self._open.pop(i) for _, i in index.stops if i in self._open]
+            self._open_per_symbol.pop(symbol, None)
+            return closed
+
+    def on_price(self, symbol: str, price: float) -> List[Tuple[Bracket, str]]:
+        """
+        Return (bracket, "stop_loss" | "take_profit") for every bracket whose
+        level this price crosses, removing them from the monitor.
+        """
+        with self._lock:
+            index = self._index.get(symbol)
+            if index is None:
+                return []
+            fired = []
+            for entries, key, reason in ((index.stops, (price,), "stop_loss"), (index.targets, (-price,), "take_profit")):
+                k = bisect.bisect_left(entries, key)
+                for _, bracket_id in entries[k:]:
+                    bracket = self._close(bracket_id)
+                    if bracket is not None:
+                        fired.append((bracket, reason))
+                index.dead -= len(entries) - k
+                del entries[k:]
+            if fired:
+                self._maybe_compact(symbol)
+            return fired
+
+    def _close(self, bracket_id: int) -> Optional[Bracket]:
+        """
+        Forget an open bracket; its two index entries stay behind as dead
+        entries until they are sliced off or compacted away.
+        """
+        bracket = self._open.pop(bracket_id, None)
+        if bracket is not None:
+            self._index[bracket.symbol].dead += 2
+            self._open_per_symbol[bracket.symbol] -= 1
+        return bracket
+
+    def _maybe_compact(self, symbol: str) -> None:
+        index = self._index[symbol]
+        if index.dead > 2 * self._open_per_symbol.get(symbol, 0):
+            index.stops = [e for e in index.stops if e[1] in self._open]
+            index.targets = [e for e in index.targets if e[1] in self._open]
+            index.dead = 0
+
+    def open_count(self, symbol: Optional[str] = None) -> int:
+        with self._lock:
+            return len(self._open) if symbol is None else self._open_per_symbol.get(symbol, 0)
+
+    def open_brackets(self, symbol: Optional[str] = None) -> List[Bracket]:
+        with self._lock:
+            return [b for b in self._open.values() if symbol is None or b.symbol == symbol]